@@ -19,6 +19,29 @@ try:
     from modules.auth import auth_bp
     from modules.admin_routes import admin_bp
     from modules.user_routes import user_bp
+    from modules.compression import init_app as init_compression
+    from modules.logs import init_app as init_logging
+    from modules.database import init_app as init_db
+    from modules.images import init_app as init_images
+    from modules.assets import init_app as init_assets
+    from modules.conditional import init_app as init_conditional
+    from modules.reference_data import warm as warm_reference_data
+    from modules.places import warm as warm_place_index
+    from modules.search import warm as warm_search_index
+    from modules.jobs import resume as resume_image_jobs
+    from modules.sweeper import resume as resume_sweeper
+
+    init_logging(app)  # JSON logs written off the request threads
+    init_compression(app)  # First, so its after_request hook runs last
+    init_db(app)  # Release each request's pooled connection on teardown
+    init_images(app)  # image_url()/image_srcset() template helpers
+    init_assets(app)  # asset_url() and the long-cached /assets/ route
+    init_conditional(app)  # ETags on public pages change with each deploy
+    warm_reference_data()  # Load regions/neighborhoods once per worker
+    warm_place_index()  # Chatbot place-name lookup over that reference data
+    warm_search_index()  # Build the full-text index once per worker
+    resume_image_jobs()  # Pick up uploads left unprocessed by a restart
+    resume_sweeper()  # Delete files queued for removal before a restart
 
     app.register_blueprint(auth_bp, url_prefix='/auth')
     app.register_blueprint(admin_bp, url_prefix='/admin')
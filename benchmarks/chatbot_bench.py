@@ -0,0 +1,164 @@
+"""Chatbot message parsing: the old keyword loops vs modules.chatbot.parse_message
+and the place lookup in modules.places.
+
+Usage: python benchmarks/chatbot_bench.py [repeats]
+
+Places are resolved against SAMPLE_REGIONS / SAMPLE_NEIGHBORHOODS below,
+so no database is needed.
+"""
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from modules.chatbot import KEYWORDS, PROPERTY_TYPE_MAPPING, parse_message  # noqa: E402
+from modules.places import PlaceIndex  # noqa: E402
+
+SAMPLE_REGIONS = [{'id': i, 'name': name} for i, name in enumerate([
+    'Greater Accra', 'Ashanti', 'Western', 'Central', 'Eastern', 'Volta', 'Northern',
+    'Upper East', 'Upper West', 'Bono'], 1)]
+SAMPLE_NEIGHBORHOODS = [{'id': i, 'name': name, 'region_id': region_id} for i, (name, region_id) in enumerate([
+    ('East Legon', 1), ('Adenta', 1), ('Madina', 1), ('Osu', 1), ('Spintex', 1), ('Kasoa', 4),
+    ('Dansoman', 1), ('Asokwa', 2), ('Bantama', 2), ('Anaji', 3), ('Kotokuraba', 4),
+    ('Tamale Central', 7)], 1)]
+
+# Messages as tenants actually type them into the chat widget
+CORPUS = [
+    "hello", "Hi there", "hey, good morning", "hola!",
+    "I need a single room in Accra", "looking for a 2 bedroom apartment in kumasi under 2000",
+    "show me self contained rooms below 1500 cedis", "any chamber and hall at Tema?",
+    "do you have stores for rent in Takoradi", "i want a shop in the central business district",
+    "3 bedroom house east legon budget 5000", "single room under 800 ghs",
+    "cheap rooms around Madina please", "I'm looking for a flat in Ho", "what can you do?",
+    "help", "how does this work", "how do I contact the landlord", "what's the owner's phone number",
+    "can I get the email of the agent", "thank you so much", "thanks!!", "I appreciate it",
+    "yes please", "ok", "sure, show me", "yeah",
+    "this is nice but do you have anything else", "is there something in Koforidua",
+    "2-bedroom in tamale max 1200", "self-contained near University of Ghana, budget 1,500",
+    "I have 3 kids and need space", "commercial space for my business in Accra central",
+    "what about Cape Coast", "Apartment with parking for 4000 GHS", "one room northern region",
+    "where are the cheapest houses", "any property in the western region under 10000",
+    "my budget is 700", "retail unit in Kumasi", "room", "bedroom", "good evening",
+    "I'm relocating to Accra next month and need a 2 bed apartment, not more than 3000 cedis",
+    "Do you have a chamber hall self contained in Kasoa for 600?", "Is the house furnished",
+    "who should I call to view the property", "nothing in my budget, what else do you have",
+    "single room in adentah", "anything around east lgon?", "chamber and hall at Dansoma",
+]
+
+# The old hard-coded regions, and what each is called in SAMPLE_REGIONS
+REGION_MAPPING = {
+    'accra': ['accra', 'greater accra'],
+    'kumasi': ['kumasi', 'ashanti'],
+    'takoradi': ['takoradi', 'western'],
+    'cape coast': ['cape coast', 'central'],
+    'tema': ['tema'],
+    'eastern': ['eastern', 'koforidua'],
+    'volta': ['volta', 'ho'],
+    'northern': ['northern', 'tamale']
+}
+OLD_REGION_NAMES = {'accra': 'Greater Accra', 'kumasi': 'Ashanti', 'takoradi': 'Western',
+                    'cape coast': 'Central', 'tema': 'Greater Accra', 'eastern': 'Eastern',
+                    'volta': 'Volta', 'northern': 'Northern'}
+
+
+# --- the pre-matcher implementation, kept verbatim for comparison ---
+
+def old_detect_property_type(user_message):
+    user_message = user_message.lower()
+    for db_type, keywords in PROPERTY_TYPE_MAPPING.items():
+        for keyword in keywords:
+            if keyword in user_message:
+                return db_type
+    return None
+
+
+def old_detect_region(user_message):
+    user_message = user_message.lower()
+    for region, keywords in REGION_MAPPING.items():
+        for keyword in keywords:
+            if keyword in user_message:
+                return region
+    return None
+
+
+def old_detect_budget(user_message):
+    user_message = user_message.lower()
+    if 'under 1000' in user_message or 'below 1000' in user_message or 'less than 1000' in user_message:
+        return 1000
+    elif 'under 5000' in user_message or 'below 5000' in user_message:
+        return 5000
+    elif 'under 10000' in user_message or 'below 10000' in user_message:
+        return 10000
+    import re
+    price_matches = re.findall(r'(\d+)\s*(?:ghs?|cedis?)?', user_message)
+    if price_matches:
+        return int(price_matches[0])
+    return None
+
+
+def old_parse(user_message):
+    user_message_lower = user_message.lower()
+    if any(word in user_message_lower for word in ['hello', 'hi', 'hey', 'hola']):
+        return ('greeting', None, None, None)
+    elif any(word in user_message_lower for word in [
+        'house', 'property', 'rent', 'room', 'apartment', 'looking for',
+        'need a', 'show me', 'find', 'want', 'store', 'shop', 'commercial',
+        'bedroom', 'self contained', 'chamber', 'single'
+    ]):
+        return ('search', old_detect_property_type(user_message_lower),
+                OLD_REGION_NAMES.get(old_detect_region(user_message_lower)), old_detect_budget(user_message_lower))
+    elif any(word in user_message_lower for word in ['yes', 'yeah', 'sure', 'ok', 'show me', 'please']):
+        return ('affirmative', None, None, None)
+    elif any(word in user_message_lower for word in ['help', 'what can you do', 'how does this work']):
+        return ('help', None, None, None)
+    elif any(word in user_message_lower for word in ['contact', 'landlord', 'owner', 'phone', 'email']):
+        return ('contact', None, None, None)
+    elif any(word in user_message_lower for word in ['thank', 'thanks', 'appreciate']):
+        return ('thanks', None, None, None)
+    return (None, None, None, None)
+
+
+places = PlaceIndex(SAMPLE_REGIONS, SAMPLE_NEIGHBORHOODS)
+
+
+def new_parse(message):
+    """The chatbot's reading of a message, in old_parse's shape"""
+    intent, property_type, budget = parse_message(message)
+    place = places.resolve(message, KEYWORDS)
+    if intent is None and place is not None:
+        intent = 'search'
+    if intent != 'search':
+        return (intent, None, None, None)
+    return (intent, property_type, place.name if place else None, budget)
+
+
+def resolve(message):
+    return places.resolve(message, KEYWORDS)
+
+
+def per_message_us(fn, repeats):
+    best = min(timeit.repeat(lambda: [fn(m) for m in CORPUS], number=repeats, repeat=5))
+    return best / repeats / len(CORPUS) * 1e6
+
+
+if __name__ == '__main__':
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    re.purge()  # the old detect_budget relied on re's internal cache
+
+    before = per_message_us(old_parse, repeats)
+    after = per_message_us(parse_message, repeats)
+    print(f"old keyword loops: {before:.2f} us/message")
+    print(f"compiled matcher:  {after:.2f} us/message")
+    print(f"speedup: {before / after:.2f}x")
+
+    places.memo.clear()
+    cold = per_message_us(resolve, 1)
+    warm = per_message_us(resolve, repeats)
+    print(f"\nplace lookup: {cold:.2f} us/message cold, {warm:.2f} us/message warm")
+
+    changed = [(m, old_parse(m), new_parse(m)) for m in CORPUS if old_parse(m) != new_parse(m)]
+    print(f"\n{len(changed)} of {len(CORPUS)} messages are understood differently:")
+    for message, old, new in changed:
+        print(f"  {message!r}\n      old {old}\n      new {new}")
@@ -0,0 +1,78 @@
+"""/chatbot latency under a burst, with and without the answer cache.
+
+Usage: python benchmarks/chatbot_burst_bench.py [requests] [threads]
+
+Runs the real app (and database from config.py) in-process through Flask's
+test client. Every thread fires its share of the burst back to back; the
+messages mix searches that reduce to a handful of (type, place, budget)
+tuples with greetings, help and thanks, as a busy afternoon would.
+"""
+import logging
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import app  # noqa: E402
+from modules.user_routes import chatbot_cache  # noqa: E402
+
+MESSAGES = [
+    "single room in accra under 1000", "I need a single room in Accra, max 1000 cedis",
+    "any 2 bedroom in kumasi", "looking for a two bedroom apartment in Kumasi",
+    "self contained in adenta", "show me self-contained rooms around Adenta",
+    "store in kasoa", "shops for rent in Kasoa",
+    "hello", "hi there", "help", "thanks!", "yes please", "chamber and hall under 800",
+]
+
+
+def burst(total, threads):
+    """Per-request latencies in ms for ``total`` requests over ``threads`` threads"""
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(offset):
+        client = app.test_client()
+        mine = []
+        for i in range(offset, total, threads):
+            started = time.perf_counter()
+            response = client.post('/chatbot', json={'message': MESSAGES[i % len(MESSAGES)]})
+            mine.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == 200
+        with lock:
+            latencies.extend(mine)
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return sorted(latencies)
+
+
+def percentile(latencies, p):
+    return latencies[min(len(latencies) - 1, int(len(latencies) * p / 100))]
+
+
+def report(label, latencies, elapsed):
+    print(f"{label:<9} p50 {percentile(latencies, 50):6.2f} ms   p95 {percentile(latencies, 95):6.2f} ms   "
+          f"p99 {percentile(latencies, 99):6.2f} ms   {len(latencies) / elapsed:7.0f} req/s")
+
+
+if __name__ == '__main__':
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    logging.getLogger('modules.user_routes').setLevel(logging.WARNING)
+    burst(len(MESSAGES), 1)  # warm the pool, reference data and place index
+
+    max_bytes = chatbot_cache.max_bytes
+    for label, cache_bytes in (('no cache', 0), ('cache', max_bytes)):
+        chatbot_cache.clear()
+        chatbot_cache.hits = chatbot_cache.misses = 0
+        chatbot_cache.max_bytes = cache_bytes  # 0: every reply is too big to keep
+        started = time.perf_counter()
+        latencies = burst(total, threads)
+        report(label, latencies, time.perf_counter() - started)
+    chatbot_cache.max_bytes = max_bytes
+    print(f"cache: {chatbot_cache.stats()}")
@@ -0,0 +1,78 @@
+"""/chatbot throughput with and without the CHATBOT_MAX_CONCURRENT busy limit.
+
+Usage: python benchmarks/chatbot_load_bench.py [requests] [threads]
+
+Runs the real app (and database from config.py) in-process with the answer
+cache off, so every chat runs its query. Threads stand in for a gthread
+worker's request threads. Chats turned away by the CHATBOT_MAX_CONCURRENT
+limit are counted separately; their fast replies are left out of the
+latency figures. "no limit" gives every chat a query slot, which is how
+the view behaved before the limit was added.
+"""
+import logging
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import app  # noqa: E402
+from chatbot_burst_bench import percentile  # noqa: E402
+from modules import user_routes  # noqa: E402
+from modules.user_routes import CHATBOT_BUSY_REPLY, CHATBOT_MAX_CONCURRENT, chatbot_cache  # noqa: E402
+
+# Searches only, each a different query
+MESSAGES = [f"{kind} in {place} under {budget}"
+            for kind in ('single room', '2 bedroom', 'self contained', 'store', 'chamber and hall')
+            for place in ('accra', 'kumasi', 'adenta', 'kasoa', 'tamale')
+            for budget in (800, 1500, 3000)]
+
+
+def load(total, threads):
+    """(latencies of answered chats in ms, busy replies, seconds taken)"""
+    latencies, busy = [], [0]
+    lock = threading.Lock()
+
+    def worker(offset):
+        client = app.test_client()
+        mine, turned_away = [], 0
+        for i in range(offset, total, threads):
+            started = time.perf_counter()
+            response = client.post('/chatbot', json={'message': MESSAGES[i % len(MESSAGES)]})
+            elapsed = (time.perf_counter() - started) * 1000
+            if response.json['response'] == CHATBOT_BUSY_REPLY:
+                turned_away += 1
+            else:
+                mine.append(elapsed)
+        with lock:
+            latencies.extend(mine)
+            busy[0] += turned_away
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return sorted(latencies), busy[0], time.perf_counter() - started
+
+
+if __name__ == '__main__':
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    logging.getLogger('modules.user_routes').setLevel(logging.ERROR)
+    chatbot_cache.max_bytes = 0  # every reply is too big to keep: all chats query
+
+    limited = user_routes.chatbot_slots
+    modes = [('no limit', threading.BoundedSemaphore(threads)), ('limit', limited)]
+
+    print(f"{total} chats on {threads} threads, limit {CHATBOT_MAX_CONCURRENT} querying at once")
+    for label, slots in modes:
+        user_routes.chatbot_slots = slots
+        load(threads, threads)  # open connections before timing
+        latencies, busy, elapsed = load(total, threads)
+        answered = len(latencies)
+        print(f"{label:<10} {answered / elapsed:7.0f} answered/s   "
+              f"p50 {percentile(latencies, 50):6.2f} ms   p99 {percentile(latencies, 99):6.2f} ms   "
+              f"{busy} busy replies")
@@ -0,0 +1,74 @@
+"""CPU per listing row: old per-view dict + image_paths parsing vs modules.hydration.
+
+Usage: python benchmarks/hydration_bench.py [rows]
+"""
+import datetime
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from modules.hydration import hydrate_houses  # noqa: E402
+
+COLUMNS = [
+    'id', 'title', 'description', 'region_id', 'neighborhood_id', 'exact_location',
+    'property_type', 'completion_status', 'months_left', 'price', 'created_by',
+    'is_featured', 'image_paths', 'views', 'created_at', 'updated_at',
+    'contact_name', 'contact_phone', 'contact_email', 'region_name', 'neighborhood_name',
+]
+
+
+class FakeCursor:
+    column_names = COLUMNS
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def fetchall(self):
+        return self.rows
+
+
+def make_rows(n, legacy):
+    now = datetime.datetime.now()
+    rows = []
+    for i in range(n):
+        paths = [f'house_{i}/{j}.jpg' for j in range(3)]
+        stored = repr(paths) if legacy else json.dumps(paths)
+        rows.append((i, f'House {i}', 'Spacious and quiet', 1, 2, 'Near the market',
+                     'single_room', '100_percent_ready', None, 850, 1, 0, stored, 0, now, now,
+                     'Owner', '0240000000', 'owner@example.com', 'Greater Accra', 'Adenta'))
+    return rows
+
+
+def old_way(rows):
+    """What index/houses/manage_houses used to do for every row"""
+    houses = [dict(zip(COLUMNS, row)) for row in rows]
+    for house in houses:
+        if house['image_paths']:
+            try:
+                if isinstance(house['image_paths'], str):
+                    house['image_paths'] = json.loads(house['image_paths'].replace("'", '"'))
+            except Exception:
+                house['image_paths'] = []
+        else:
+            house['image_paths'] = []
+    return houses
+
+
+def per_row_us(fn, rows):
+    best = min(timeit.repeat(lambda: fn(rows), number=20, repeat=5))
+    return best / 20 / len(rows) * 1e6
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    rows = make_rows(n, legacy=False)
+    legacy_rows = make_rows(n, legacy=True)
+
+    before = per_row_us(old_way, legacy_rows)
+    after = per_row_us(lambda r: hydrate_houses(FakeCursor(r)), rows)
+    print(f"old dict rows + replace/json.loads (legacy data): {before:.2f} us/row")
+    print(f"hydrate_houses (normalized data, after migrate.py 0002): {after:.2f} us/row")
+    print(f"speedup: {before / after:.2f}x")
@@ -0,0 +1,90 @@
+"""Fingerprint and precompress static files for long-lived caching.
+
+Usage:
+    python build_assets.py    # write static/assets-manifest.json plus .gz/.br copies
+
+Run on each deploy after the static files change. Brotli copies are only
+written when the optional `brotli` package is installed; gzip always is.
+"""
+import gzip
+import json
+import os
+import sys
+from modules.assets import (MANIFEST_NAME, STATIC_FOLDER, file_hash, fingerprinted_name,
+                            iter_assets)
+
+# Text formats worth compressing; images and fonts are compressed already
+COMPRESSIBLE = {'.css', '.js', '.json', '.svg', '.html', '.txt', '.map', '.xml'}
+
+# Below this the compressed copy plus headers saves next to nothing
+MIN_COMPRESS_BYTES = 1024
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def human(size):
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def compress(data):
+    """{encoding: (suffix, bytes)} for each encoding available here"""
+    # mtime=0 keeps the output identical across builds
+    results = {'gzip': ('.gz', gzip.compress(data, compresslevel=9, mtime=0))}
+    if brotli is not None:
+        results['br'] = ('.br', brotli.compress(data, quality=11))
+    return results
+
+
+def build(static_folder=STATIC_FOLDER):
+    manifest = {}
+    original_total = served_total = 0
+    for filename in sorted(iter_assets(static_folder)):
+        full_path = os.path.join(static_folder, filename)
+        with open(full_path, 'rb') as f:
+            data = f.read()
+        entry = {
+            'hash': file_hash(full_path),
+            'mtime_ns': os.stat(full_path).st_mtime_ns,
+            'size': len(data),
+            'encodings': {},
+        }
+
+        if os.path.splitext(filename)[1].lower() in COMPRESSIBLE and len(data) >= MIN_COMPRESS_BYTES:
+            for encoding, (suffix, compressed) in compress(data).items():
+                if len(compressed) < len(data):
+                    with open(full_path + suffix, 'wb') as f:
+                        f.write(compressed)
+                    entry['encodings'][encoding] = len(compressed)
+                elif os.path.exists(full_path + suffix):
+                    os.remove(full_path + suffix)  # stale copy from an earlier build
+
+        manifest[filename] = entry
+        best = min(entry['encodings'].values(), default=len(data))
+        original_total += len(data)
+        served_total += best
+        sizes = ', '.join(f"{enc} {human(size)}" for enc, size in sorted(entry['encodings'].items()))
+        print(f"   {fingerprinted_name(filename, entry['hash'])}  {human(len(data))}"
+              + (f" -> {sizes}" if sizes else ''))
+
+    with open(os.path.join(static_folder, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    print(f"✅ {len(manifest)} assets fingerprinted, {human(original_total)} -> "
+          f"{human(served_total)} for clients accepting compression")
+    if brotli is None:
+        print("⚠️  brotli not installed; only gzip copies were written (pip install brotli)")
+    return manifest
+
+
+if __name__ == '__main__':
+    if sys.argv[1:]:
+        print(__doc__)
+        sys.exit(1)
+    build()
@@ -0,0 +1,156 @@
+"""Delete image files that nothing references any more.
+
+Usage:
+    python gc_uploads.py            # delete orphans and report the space reclaimed
+    python gc_uploads.py --dry-run  # only list what would be deleted
+"""
+import os
+import sys
+import time
+from modules.database import get_db_connection
+from modules.hydration import PLACEHOLDER_IMAGE, parse_image_paths
+from modules.images import VARIANT_SUFFIXES
+from modules.resumable import UPLOAD_DIR as CHUNKED_UPLOAD_DIR, UPLOAD_EXPIRY_SECONDS
+from modules.storage import STAGING_FOLDER, get_storage
+from modules.sweeper import sweep
+from modules.uploads import BLOB_DIR
+
+BATCH_SIZE = 500
+
+# Younger files may belong to an upload whose transaction hasn't committed
+MIN_AGE_SECONDS = 3600
+
+
+def referenced_paths(cursor):
+    """Image paths used by any house or by an image job still in progress"""
+    referenced = set()
+    last_id = 0
+    while True:
+        cursor.execute("SELECT id, image_paths FROM houses WHERE id > %s ORDER BY id LIMIT %s",
+                       (last_id, BATCH_SIZE))
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        for _, image_paths in rows:
+            referenced.update(parse_image_paths(image_paths))
+        last_id = rows[-1][0]
+
+    cursor.execute("SELECT paths FROM image_jobs WHERE status IN ('pending', 'running')")
+    for (paths,) in cursor.fetchall():
+        referenced.update(parse_image_paths(paths))
+    return referenced
+
+
+def registered_blobs(cursor, paths):
+    """Which of ``paths`` still have a row in the uploads table"""
+    paths = list(paths)
+    found = set()
+    for start in range(0, len(paths), BATCH_SIZE):
+        batch = paths[start:start + BATCH_SIZE]
+        cursor.execute(f"SELECT path FROM uploads WHERE path IN ({', '.join(['%s'] * len(batch))})", batch)
+        found.update(row[0] for row in cursor.fetchall())
+    return found
+
+
+# Everything stored under these prefixes is an upload, a variant or a leftover temp file
+UPLOAD_PREFIXES = (BLOB_DIR + '/', 'house_', '.incoming-')
+
+
+def stem(path):
+    for suffix in VARIANT_SUFFIXES:
+        if path.endswith(suffix):
+            return path[:-len(suffix)]
+    return path.rsplit('.', 1)[0]
+
+
+def find_orphans(conn):
+    cursor = conn.cursor()
+    referenced = referenced_paths(cursor)
+    stored = list(get_storage().walk(UPLOAD_PREFIXES))
+    cutoff = time.time() - MIN_AGE_SECONDS
+    files = [f for f in stored if f[2] < cutoff]
+
+    # Blobs referenced only by an uncommitted or unattached upload still have a row
+    originals = {path for path, _, _ in files if not path.endswith(VARIANT_SUFFIXES)}
+    unreferenced_blobs = {p for p in originals if p.startswith(BLOB_DIR + '/') and p not in referenced}
+    kept = (originals & referenced) | registered_blobs(cursor, unreferenced_blobs)
+    kept_stems = {stem(p) for p in kept | referenced}
+
+    orphans = [(path, size) for path, size, _ in files
+               if path not in kept and stem(path) not in kept_stems]
+
+    stored_paths = {path for path, _, _ in stored}
+    missing = [p for p in referenced if p != PLACEHOLDER_IMAGE and p not in stored_paths]
+    cursor.close()
+    return orphans, missing
+
+
+def stale_local_files(folder, max_age):
+    """Files in ``folder`` untouched for ``max_age`` seconds"""
+    if not os.path.isdir(folder):
+        return []
+    cutoff = time.time() - max_age
+    stale = []
+    for name in os.listdir(folder):
+        full_path = os.path.join(folder, name)
+        stat = os.stat(full_path)
+        if stat.st_mtime < cutoff:
+            stale.append((full_path, stat.st_size))
+    return stale
+
+
+def stale_chunked_uploads():
+    """Chunked uploads that were never finalized, and staged files a crash left behind"""
+    return (stale_local_files(CHUNKED_UPLOAD_DIR, UPLOAD_EXPIRY_SECONDS)
+            + stale_local_files(STAGING_FOLDER, MIN_AGE_SECONDS))
+
+
+def human(size):
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def collect(conn, dry_run=False):
+    if not dry_run:
+        applied = sweep()  # apply queued releases first so their files count
+        print(f"🧹 Applied {applied} queued releases")
+
+    storage = get_storage()
+    orphans, missing = find_orphans(conn)
+    # (description, size, delete) for stored orphans and local chunk leftovers
+    targets = [(path, size, lambda path=path: storage.delete(path)) for path, size in orphans]
+    targets += [(path, size, lambda path=path: os.remove(path)) for path, size in stale_chunked_uploads()]
+
+    reclaimed = 0
+    for path, size, delete in targets:
+        if dry_run:
+            print(f"   would delete {path} ({human(size)})")
+            reclaimed += size
+            continue
+        try:
+            delete()
+            reclaimed += size
+        except Exception as e:
+            print(f"   ❌ {path}: {e}")
+
+    verb = 'would be reclaimed' if dry_run else 'reclaimed'
+    print(f"✅ {len(targets)} orphaned files, {human(reclaimed)} {verb}")
+    if missing:
+        print(f"⚠️  {len(missing)} referenced images are missing on disk, e.g. {missing[0]}")
+    return reclaimed
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    if args not in ([], ['--dry-run']):
+        print(__doc__)
+        sys.exit(1)
+
+    conn = get_db_connection()
+    try:
+        collect(conn, dry_run=bool(args))
+    finally:
+        conn.close()
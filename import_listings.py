@@ -0,0 +1,322 @@
+"""Bulk-import listings from a CSV or JSON Lines file.
+
+Usage:
+    python import_listings.py FILE --owner USER [--images DIR] [--batch N] [--dry-run] [--defer-images]
+
+FILE is .csv (header row) or .jsonl/.ndjson (one object per line) with the
+add-house fields: title, description, region, neighborhood (names or ids),
+exact_location, property_type, completion_status, months_left, price,
+is_featured, contact_name, contact_phone, contact_email and images
+(paths relative to --images; ';'-separated in CSV, a list in JSONL).
+
+USER (username or id) becomes the listings' owner. Rows that fail
+validation are reported by line number and skipped; the rest are inserted
+N at a time, one transaction per batch. --dry-run only validates.
+Images are resized in this process afterwards unless --defer-images
+leaves them to the web workers' job queue.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from decimal import Decimal, InvalidOperation
+from modules.cache import bump_inventory_generation
+from modules.database import get_db_connection
+from modules.hydration import PLACEHOLDER_IMAGE, dump_image_paths
+from modules.jobs import drain as process_image_jobs, enqueue as enqueue_image_job
+from modules.reference_data import get_neighborhoods, get_regions
+from modules.search import bump_search_generation
+from modules.uploads import ALLOWED_EXTENSIONS, store_local_file
+
+BATCH_SIZE = 500
+
+# Only the first few errors are printed; the count covers all of them
+MAX_ERRORS_SHOWN = 50
+
+PROPERTY_TYPES = {'single_room', 'self_contained', 'chamber_hall', '2_bedroom', '3_bedroom',
+                  'store', 'apartment'}
+COMPLETION_STATUSES = {'50_70_percent', '100_percent_ready', 'x_months_left'}
+
+INSERT_HOUSE = """
+    INSERT INTO houses
+    (title, description, region_id, neighborhood_id, exact_location,
+     property_type, completion_status, months_left, price, created_by, is_featured,
+     contact_name, contact_phone, contact_email, image_paths)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+class RowError(ValueError):
+    """A listing that can't be imported as given"""
+
+
+def read_rows(path):
+    """Yield (line number, dict) without loading the file into memory"""
+    if path.lower().endswith(('.jsonl', '.ndjson')):
+        with open(path, encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    yield line_no, RowError(f"invalid JSON: {e}")
+                    continue
+                yield line_no, row if isinstance(row, dict) else RowError("expected a JSON object")
+    else:
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+
+
+class Places:
+    """Region/neighborhood lookups by id or case-insensitive name"""
+
+    def __init__(self):
+        self.regions = {}
+        for region in get_regions():
+            self.regions[str(region['id'])] = self.regions[region['name'].strip().lower()] = region['id']
+        self.neighborhoods = {}
+        for hood in get_neighborhoods():
+            for key in (str(hood['id']), hood['name'].strip().lower()):
+                self.neighborhoods[(hood['region_id'], key)] = hood['id']
+
+    def resolve(self, region, neighborhood):
+        region_id = self.regions.get(str(region).strip().lower())
+        if region_id is None:
+            raise RowError(f"unknown region {region!r}")
+        neighborhood_id = self.neighborhoods.get((region_id, str(neighborhood).strip().lower()))
+        if neighborhood_id is None:
+            raise RowError(f"unknown neighborhood {neighborhood!r} in region {region!r}")
+        return region_id, neighborhood_id
+
+
+def _text(row, field, required=False):
+    value = row.get(field)
+    value = '' if value is None else str(value).strip()
+    if required and not value:
+        raise RowError(f"{field} is required")
+    return value or None
+
+
+def _images(row, images_dir):
+    value = row.get('images') or []
+    if isinstance(value, str):
+        value = [p for p in value.replace('|', ';').split(';')]
+    paths = []
+    for name in value:
+        name = str(name).strip()
+        if not name:
+            continue
+        if name.rsplit('.', 1)[-1].lower() not in ALLOWED_EXTENSIONS:
+            raise RowError(f"image {name!r} is not a {'/'.join(sorted(ALLOWED_EXTENSIONS))} file")
+        full_path = os.path.join(images_dir, name)
+        if not os.path.isfile(full_path):
+            raise RowError(f"image {name!r} not found in {images_dir}")
+        paths.append(full_path)
+    return paths
+
+
+def parse_row(row, places, owner_id, images_dir):
+    """(INSERT parameters, image files) for a raw row, or RowError"""
+    if isinstance(row, RowError):
+        raise row
+    title = _text(row, 'title', required=True)
+    region_id, neighborhood_id = places.resolve(_text(row, 'region', required=True),
+                                                _text(row, 'neighborhood', required=True))
+
+    property_type = _text(row, 'property_type', required=True)
+    if property_type not in PROPERTY_TYPES:
+        raise RowError(f"unknown property_type {property_type!r}")
+    completion_status = _text(row, 'completion_status') or '100_percent_ready'
+    if completion_status not in COMPLETION_STATUSES:
+        raise RowError(f"unknown completion_status {completion_status!r}")
+
+    months_left = _text(row, 'months_left')
+    if months_left is not None:
+        if not months_left.isdigit():
+            raise RowError(f"months_left must be a whole number, got {months_left!r}")
+        months_left = int(months_left)
+
+    try:
+        price = Decimal(_text(row, 'price', required=True).replace(',', ''))
+    except InvalidOperation:
+        raise RowError(f"price must be a number, got {row.get('price')!r}") from None
+    if not price.is_finite() or price <= 0:
+        raise RowError("price must be positive")
+
+    is_featured = (_text(row, 'is_featured') or '').lower() in ('1', 'true', 'yes', 'y')
+
+    params = (title, _text(row, 'description') or '', region_id, neighborhood_id,
+              _text(row, 'exact_location') or '', property_type, completion_status, months_left,
+              price, owner_id, is_featured, _text(row, 'contact_name'), _text(row, 'contact_phone'),
+              _text(row, 'contact_email'), dump_image_paths([PLACEHOLDER_IMAGE]))
+    return params, _images(row, images_dir)
+
+
+def find_owner(cursor, owner):
+    cursor.execute("SELECT id, role FROM users WHERE username = %s OR id = %s",
+                   (owner, int(owner) if owner.isdigit() else -1))
+    row = cursor.fetchone()
+    if row is None:
+        raise SystemExit(f"❌ No user {owner!r}")
+    if row[1] not in ('admin', 'landlord'):
+        raise SystemExit(f"❌ {owner!r} is a {row[1]}; listings need an admin or landlord owner")
+    return row[0]
+
+
+class Importer:
+    """Inserts validated rows batch by batch and keeps the tallies for the report"""
+
+    def __init__(self, conn, owner_id):
+        self.conn = conn
+        self.owner_id = owner_id
+        self.imported = 0
+        self.jobs = 0
+        self.images_new = 0
+        self.images_known = 0
+        self.errors = []
+
+    def error(self, line_no, message):
+        self.errors.append((line_no, message))
+        if len(self.errors) <= MAX_ERRORS_SHOWN:
+            print(f"   ❌ line {line_no}: {message}")
+
+    def _attach_images(self, cursor, house_id, images):
+        """Store a listing's images and queue their processing; returns how many were new"""
+        paths, new = [], 0
+        for image in images:
+            path, is_new = store_local_file(cursor, image)
+            paths.append(path)
+            new += is_new
+        enqueue_image_job(cursor, house_id, self.owner_id, paths)
+        return new
+
+    def _committed(self, rows, images, new_images):
+        self.imported += rows
+        self.jobs += sum(1 for files in images if files)
+        self.images_new += new_images
+        self.images_known += sum(len(files) for files in images) - new_images
+
+    def _insert_batch(self, batch):
+        """One multi-row INSERT for the whole batch; ids are read back in insert order"""
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM houses")
+            last_id = cursor.fetchone()[0]
+            cursor.executemany(INSERT_HOUSE, [params for _, params, _ in batch])
+            cursor.execute("SELECT id FROM houses WHERE created_by = %s AND id > %s ORDER BY id LIMIT %s",
+                           (self.owner_id, last_id, len(batch) + 1))
+            ids = [row[0] for row in cursor.fetchall()]
+            if len(ids) != len(batch):
+                # The owner added a listing concurrently; ids can't be matched up
+                raise RuntimeError("inserted ids are ambiguous")
+            new_images = 0
+            for (_, _, images), house_id in zip(batch, ids):
+                if images:
+                    new_images += self._attach_images(cursor, house_id, images)
+            self.conn.commit()
+            self._committed(len(batch), [images for _, _, images in batch], new_images)
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    def _insert_rows(self, batch):
+        """Row-at-a-time fallback, so one bad row doesn't sink its batch"""
+        cursor = self.conn.cursor()
+        try:
+            for line_no, params, images in batch:
+                try:
+                    cursor.execute(INSERT_HOUSE, params)
+                    new_images = self._attach_images(cursor, cursor.lastrowid, images) if images else 0
+                    self.conn.commit()
+                    self._committed(1, [images], new_images)
+                except Exception as e:
+                    self.conn.rollback()
+                    self.error(line_no, str(e))
+        finally:
+            cursor.close()
+
+    def insert(self, batch):
+        if not batch:
+            return
+        try:
+            self._insert_batch(batch)
+        except Exception:
+            self._insert_rows(batch)
+
+
+def run(path, owner, images_dir, batch_size=BATCH_SIZE, dry_run=False, defer_images=False):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        owner_id = find_owner(cursor, owner)
+    finally:
+        cursor.close()
+
+    places = Places()
+    importer = Importer(conn, owner_id)
+    started = time.monotonic()
+    valid = 0
+    batch = []
+    try:
+        for line_no, row in read_rows(path):
+            try:
+                params, images = parse_row(row, places, owner_id, images_dir)
+            except RowError as e:
+                importer.error(line_no, str(e))
+                continue
+            valid += 1
+            if dry_run:
+                continue
+            batch.append((line_no, params, images))
+            if len(batch) >= batch_size:
+                importer.insert(batch)
+                batch = []
+                elapsed = time.monotonic() - started
+                print(f"   {importer.imported:,} rows  {importer.imported / elapsed:,.0f} rows/s")
+        if not dry_run:
+            importer.insert(batch)
+    finally:
+        if importer.imported:
+            bump_inventory_generation()  # web workers drop cached pages
+            bump_search_generation()  # and their search indexes catch up
+        conn.close()
+
+    elapsed = time.monotonic() - started
+    if dry_run:
+        print(f"✅ {valid:,} rows valid, {len(importer.errors):,} invalid ({elapsed:.1f}s)")
+    else:
+        print(f"✅ Imported {importer.imported:,} listings in {elapsed:.1f}s "
+              f"({importer.imported / max(elapsed, 1e-6):,.0f} rows/s), {len(importer.errors):,} rows failed")
+        print(f"   images: {importer.images_new:,} stored, {importer.images_known:,} already present")
+    if len(importer.errors) > MAX_ERRORS_SHOWN:
+        print(f"   ({len(importer.errors) - MAX_ERRORS_SHOWN:,} more errors not shown)")
+
+    if importer.jobs and not defer_images:
+        print(f"🖼️  Processing images for {importer.jobs:,} listings...")
+        started = time.monotonic()
+        process_image_jobs()
+        print(f"✅ Images processed in {time.monotonic() - started:.1f}s")
+    elif importer.jobs:
+        print(f"🖼️  {importer.jobs:,} image jobs queued for the web workers")
+    return importer
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('file')
+    parser.add_argument('--owner', required=True)
+    parser.add_argument('--images', default='.')
+    parser.add_argument('--batch', type=int, default=BATCH_SIZE)
+    parser.add_argument('--dry-run', action='store_true')
+    parser.add_argument('--defer-images', action='store_true')
+    args = parser.parse_args()
+
+    result = run(args.file, args.owner, args.images, args.batch, args.dry_run, args.defer_images)
+    sys.exit(1 if result.errors else 0)
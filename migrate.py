@@ -0,0 +1,332 @@
+"""Versioned schema migrations.
+
+Usage:
+    python migrate.py            # apply pending migrations
+    python migrate.py status     # list applied / pending migrations
+    python migrate.py explain    # check the hot queries use their indexes
+"""
+import os
+import sys
+from modules.database import get_db_connection
+from modules.hydration import PLACEHOLDER_IMAGE, parse_image_paths, dump_image_paths
+from modules.storage import UPLOAD_FOLDER
+from modules.uploads import adopt_file, is_blob, remove_local_files
+
+
+def index_exists(cursor, table, columns):
+    """True if ``table`` already has an index whose leading columns are ``columns``"""
+    cursor.execute("""
+        SELECT index_name, column_name
+        FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s
+        ORDER BY index_name, seq_in_index
+    """, (table,))
+    indexes = {}
+    for index_name, column_name in cursor.fetchall():
+        indexes.setdefault(index_name, []).append(column_name.lower())
+    wanted = [c.lower() for c in columns]
+    return any(cols[:len(wanted)] == wanted for cols in indexes.values())
+
+
+def ensure_index(cursor, table, name, columns):
+    if index_exists(cursor, table, columns):
+        print(f"   ↪ {table}({', '.join(columns)}) already indexed")
+        return
+    cursor.execute(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})")
+    print(f"   ✅ {name} on {table}({', '.join(columns)})")
+
+
+def migration_0001_hot_query_indexes(cursor):
+    # /houses: equality filters first, then the keyset sort key; InnoDB
+    # appends the primary key, so these also cover the (created_at, id) order
+    ensure_index(cursor, 'houses', 'idx_houses_created', ['created_at'])
+    ensure_index(cursor, 'houses', 'idx_houses_region_type_created', ['region_id', 'property_type', 'created_at'])
+    ensure_index(cursor, 'houses', 'idx_houses_type_created', ['property_type', 'created_at'])
+    ensure_index(cursor, 'houses', 'idx_houses_region_created', ['region_id', 'created_at'])
+    ensure_index(cursor, 'houses', 'idx_houses_price', ['price'])
+    # Landlord dashboard
+    ensure_index(cursor, 'houses', 'idx_houses_owner_created', ['created_by', 'created_at'])
+
+    # Admin dashboard metrics and manage_users paging
+    ensure_index(cursor, 'users', 'idx_users_role', ['role'])
+    ensure_index(cursor, 'users', 'idx_users_active', ['is_active'])
+    ensure_index(cursor, 'users', 'idx_users_created', ['created_at'])
+    ensure_index(cursor, 'users', 'idx_users_last_login_created', ['last_login', 'created_at'])
+    # Login: "username = %s OR email = %s" becomes an index_merge union
+    ensure_index(cursor, 'users', 'idx_users_username', ['username'])
+    ensure_index(cursor, 'users', 'idx_users_email', ['email'])
+
+
+def migration_0002_normalize_image_paths(cursor):
+    # Older rows hold Python-repr lists ("['a.jpg']") or bare paths; rewrite
+    # them as JSON so modules.hydration only ever needs one json.loads
+    last_id, fixed = 0, 0
+    while True:
+        cursor.execute("SELECT id, image_paths FROM houses WHERE id > %s ORDER BY id LIMIT 500", (last_id,))
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        updates = []
+        for house_id, image_paths in rows:
+            if image_paths is None:
+                continue
+            if isinstance(image_paths, (bytes, bytearray)):
+                image_paths = image_paths.decode()
+            normalized = dump_image_paths(parse_image_paths(image_paths))
+            if normalized != image_paths:
+                updates.append((normalized, house_id))
+        if updates:
+            cursor.executemany("UPDATE houses SET image_paths = %s WHERE id = %s", updates)
+            fixed += len(updates)
+        last_id = rows[-1][0]
+    print(f"   ✅ normalized image_paths on {fixed} houses")
+
+
+def migration_0003_image_jobs(cursor):
+    # Uploads are processed off the request by modules.jobs; the queue lives
+    # here so it survives restarts and is shared by every worker process
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS image_jobs (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            house_id INT NOT NULL,
+            created_by INT,
+            status VARCHAR(16) NOT NULL DEFAULT 'pending',
+            paths TEXT NOT NULL,
+            total INT NOT NULL DEFAULT 0,
+            processed INT NOT NULL DEFAULT 0,
+            accepted INT NOT NULL DEFAULT 0,
+            error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        )
+    """)
+    ensure_index(cursor, 'image_jobs', 'idx_image_jobs_status', ['status', 'id'])
+    ensure_index(cursor, 'image_jobs', 'idx_image_jobs_owner', ['created_by', 'created_at'])
+    print("   ✅ image_jobs table")
+
+
+def migration_0004_content_addressed_uploads(cursor):
+    # modules.uploads stores each distinct image once, keyed by SHA-256,
+    # and counts the houses.image_paths entries that point at it
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS uploads (
+            hash CHAR(64) PRIMARY KEY,
+            path VARCHAR(255) NOT NULL,
+            size BIGINT NOT NULL,
+            refcount INT NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE KEY uq_uploads_path (path)
+        )
+    """)
+
+    # Move existing house_<id>/ files into the blob store, merging duplicates
+    last_id, adopted, replaced = 0, 0, []
+    while True:
+        cursor.execute("SELECT id, image_paths FROM houses WHERE id > %s ORDER BY id LIMIT 500", (last_id,))
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        for house_id, image_paths in rows:
+            paths = parse_image_paths(image_paths)
+            updated = []
+            for path in paths:
+                if path == PLACEHOLDER_IMAGE or is_blob(path) or not os.path.exists(os.path.join(UPLOAD_FOLDER, path)):
+                    updated.append(path)
+                    continue
+                updated.append(adopt_file(cursor, path))
+                replaced.append(path)
+            if updated != paths:
+                cursor.execute("UPDATE houses SET image_paths = %s WHERE id = %s",
+                               (dump_image_paths(updated), house_id))
+                adopted += 1
+        last_id = rows[-1][0]
+    print(f"   ✅ moved images of {adopted} houses to content-addressed storage")
+
+    def remove_old_files():
+        for path in replaced:
+            remove_local_files(path)
+        print(f"   ✅ removed {len(replaced)} per-house image files")
+    return remove_old_files
+
+
+def migration_0005_upload_releases(cursor):
+    # Views queue the image paths a house stopped using; modules.sweeper
+    # releases them and deletes unused files in the background
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS upload_releases (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            paths TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    print("   ✅ upload_releases table")
+
+
+def migration_0006_neighborhood_index(cursor):
+    # The chatbot filters on the neighborhood it resolved from the message
+    ensure_index(cursor, 'houses', 'idx_houses_neighborhood_created', ['neighborhood_id', 'created_at'])
+
+
+def migration_0007_created_at_not_null(cursor):
+    # Keyset pagination sorts and seeks on (created_at, id); a NULL there
+    # can't be compared, so such rows would end the listing early. Rows
+    # with no date are given the oldest possible one, where NULLs sorted.
+    for table in ('houses', 'users'):
+        cursor.execute(f"UPDATE {table} SET created_at = FROM_UNIXTIME(1) WHERE created_at IS NULL")
+        fixed = cursor.rowcount
+        cursor.execute("""
+            SELECT column_type FROM information_schema.columns
+            WHERE table_schema = DATABASE() AND table_name = %s AND column_name = 'created_at'
+        """, (table,))
+        column_type = cursor.fetchone()[0]
+        if isinstance(column_type, (bytes, bytearray)):
+            column_type = column_type.decode()
+        cursor.execute(f"ALTER TABLE {table} MODIFY created_at {column_type} NOT NULL DEFAULT CURRENT_TIMESTAMP")
+        print(f"   ✅ {table}.created_at is NOT NULL ({fixed} rows backfilled)")
+
+
+def migration_0008_search_catch_up(cursor):
+    # modules.search brings each worker's index up to date from the houses
+    # changed since its last load, plus the ids deleted since then
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS house_deletions (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            house_id INT NOT NULL,
+            deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    ensure_index(cursor, 'house_deletions', 'idx_house_deletions_deleted', ['deleted_at'])
+    ensure_index(cursor, 'houses', 'idx_houses_updated', ['updated_at'])
+    print("   ✅ house_deletions table")
+
+
+# (version, description, function) - append only, never renumber
+MIGRATIONS = [
+    (1, 'Composite indexes for listing, dashboard and login queries', migration_0001_hot_query_indexes),
+    (2, 'Store houses.image_paths as plain JSON', migration_0002_normalize_image_paths),
+    (3, 'Persistent queue for background image processing', migration_0003_image_jobs),
+    (4, 'Content-addressed, reference-counted image uploads', migration_0004_content_addressed_uploads),
+    (5, 'Queue of image files to release in the background', migration_0005_upload_releases),
+    (6, 'Index for chatbot searches by neighborhood', migration_0006_neighborhood_index),
+    (7, 'houses/users.created_at NOT NULL for keyset pagination', migration_0007_created_at_not_null),
+    (8, 'Deleted house ids and updated_at index for search index catch-up', migration_0008_search_catch_up),
+]
+
+
+# (description, query, params, indexes any of which the planner should pick)
+EXPLAIN_CHECKS = [
+    ("/houses newest first",
+     "SELECT h.id FROM houses h ORDER BY h.created_at DESC, h.id DESC LIMIT 13",
+     (), {'idx_houses_created'}),
+    ("/houses region + type + price",
+     """SELECT h.id FROM houses h WHERE h.region_id = %s AND h.property_type = %s
+        AND h.price >= %s AND h.price <= %s ORDER BY h.created_at DESC, h.id DESC LIMIT 13""",
+     (1, 'single_room', 0, 10000), {'idx_houses_region_type_created', 'idx_houses_price'}),
+    ("/houses property type",
+     "SELECT h.id FROM houses h WHERE h.property_type = %s ORDER BY h.created_at DESC, h.id DESC LIMIT 13",
+     ('single_room',), {'idx_houses_type_created'}),
+    ("/houses region",
+     "SELECT h.id FROM houses h WHERE h.region_id = %s ORDER BY h.created_at DESC, h.id DESC LIMIT 13",
+     (1,), {'idx_houses_region_created', 'idx_houses_region_type_created'}),
+    ("chatbot neighborhood",
+     "SELECT h.id FROM houses h WHERE h.neighborhood_id = %s ORDER BY h.created_at DESC LIMIT 5",
+     (1,), {'idx_houses_neighborhood_created'}),
+    ("landlord dashboard",
+     "SELECT h.id FROM houses h WHERE h.created_by = %s ORDER BY h.created_at DESC, h.id DESC LIMIT 13",
+     (1,), {'idx_houses_owner_created'}),
+    ("users by role",
+     "SELECT COUNT(*) FROM users WHERE role = %s",
+     ('landlord',), {'idx_users_role'}),
+    ("retention",
+     """SELECT COUNT(*) FROM users WHERE last_login >= DATE_SUB(NOW(), INTERVAL 30 DAY)
+        AND created_at <= DATE_SUB(NOW(), INTERVAL 30 DAY)""",
+     (), {'idx_users_last_login_created', 'idx_users_created'}),
+    ("login",
+     "SELECT * FROM users WHERE username = %s OR email = %s",
+     ('admin', 'admin'), {'idx_users_username', 'idx_users_email'}),
+]
+
+
+def ensure_migrations_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            description VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def applied_versions(cursor):
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def migrate(conn):
+    cursor = conn.cursor()
+    ensure_migrations_table(cursor)
+    done = applied_versions(cursor)
+    pending = [m for m in MIGRATIONS if m[0] not in done]
+
+    if not pending:
+        print("✅ Schema is up to date")
+        return
+
+    for version, description, upgrade in pending:
+        print(f"🔧 Applying {version:04d}: {description}")
+        # MySQL DDL commits implicitly, so each step must be safe to re-run
+        after_commit = upgrade(cursor)
+        cursor.execute("INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                       (version, description))
+        conn.commit()
+        # Irreversible cleanup (e.g. deleting files) only once the data change is durable
+        if after_commit:
+            after_commit()
+    cursor.close()
+
+
+def status(conn):
+    cursor = conn.cursor()
+    ensure_migrations_table(cursor)
+    done = applied_versions(cursor)
+    for version, description, _ in MIGRATIONS:
+        mark = '✅' if version in done else '⏳'
+        print(f"{mark} {version:04d} {description}")
+    cursor.close()
+
+
+def explain(conn):
+    """EXPLAIN each hot query and report whether the planner used our index"""
+    cursor = conn.cursor(dictionary=True)
+    failures = 0
+    for description, query, params, wanted in EXPLAIN_CHECKS:
+        cursor.execute("EXPLAIN " + query, params)
+        plan = cursor.fetchall()
+        used = set()
+        for row in plan:
+            used.update((row.get('key') or '').split(','))
+        if used & wanted:
+            print(f"✅ {description}: {', '.join(sorted(used & wanted))}")
+        else:
+            failures += 1
+            print(f"❌ {description}: planner chose {', '.join(sorted(filter(None, used))) or 'a full scan'}")
+    cursor.close()
+    if failures:
+        print(f"\n⚠️  {failures} queries are not using their index "
+              "(small tables are often scanned on purpose - re-check with production data)")
+    return failures
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'migrate'
+    commands = {'migrate': migrate, 'status': status, 'explain': explain}
+    if command not in commands:
+        print(__doc__)
+        sys.exit(1)
+
+    conn = get_db_connection()
+    try:
+        result = commands[command](conn)
+    finally:
+        conn.close()
+    sys.exit(1 if result else 0)
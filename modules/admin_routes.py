@@ -1,15 +1,27 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
-from modules.database import get_db_connection
-import os
-import uuid
-import json
-from werkzeug.utils import secure_filename
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
+from modules.cache import CACHES, bump_inventory_generation, inventory_generation
+from modules.database import get_db
+from modules.exports import FORMATS as EXPORT_FORMATS, export_houses as stream_houses_export, \
+    export_users as stream_users_export
+from modules.filters import browse_filters, house_filter_sql
+from modules.hydration import PLACEHOLDER_IMAGE, hydrate_houses, hydrate_house, parse_image_paths, dump_image_paths
+from modules.jobs import enqueue as enqueue_image_job, jobs_for_user, kick as kick_image_workers
+from modules.pagination import paginate
+from modules.reference_data import get_regions, get_neighborhoods
+from modules.resumable import UploadError, create as create_upload_session, finalize as finalize_upload, \
+    status as upload_session_status, write_chunk
+from modules.search import bump_search_generation, index_house, record_deletion, unindex_house
+from modules.sweeper import kick as kick_sweeper, queue_release
+from modules.uploads import ALLOWED_EXTENSIONS, store_upload
+from modules.user_routes import count_houses
+import logging
 from functools import wraps
 
+logger = logging.getLogger(__name__)
+
 admin_bp = Blueprint('admin', __name__)
 
 # Image upload configuration
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
 MAX_FILE_SIZE = 16 * 1024 * 1024  # 16MB
 
 
@@ -51,39 +63,47 @@ def allowed_file(filename):
         filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-def save_uploaded_files(files, house_id):
-    """Save uploaded files and return their paths"""
-    uploaded_paths = []
+def save_uploaded_files(conn, files, upload_ids=()):
+    """Store uploaded files and finished chunked uploads and return their paths.
 
-    # Create house-specific folder
-    upload_folder = 'static/uploads'
-    house_folder = os.path.join(upload_folder, f'house_{house_id}')
-    if not os.path.exists(house_folder):
-        os.makedirs(house_folder)
+    Files are deduplicated by content (modules.uploads), taking a
+    reference in the caller's transaction. Verifying and resizing happens
+    later in an image job (modules.jobs), which also attaches the paths
+    to the house.
+    """
+    uploaded_paths = []
 
     for file in files:
         if file and file.filename != '' and allowed_file(file.filename):
-            # Generate unique filename
             file_ext = file.filename.rsplit('.', 1)[1].lower()
-            unique_filename = f"{uuid.uuid4().hex}.{file_ext}"
-            file_path = os.path.join(house_folder, unique_filename)
+            uploaded_paths.append(store_upload(conn, file.stream, file_ext))
 
-            # Save file
-            file.save(file_path)
-
-            # Store relative path for database
-            relative_path = f"house_{house_id}/{unique_filename}"
-            uploaded_paths.append(relative_path)
+    for upload_id in upload_ids:
+        uploaded_paths.append(finalize_upload(conn, upload_id, session['user_id']))
 
     return uploaded_paths
 
 
+def after_house_write(conn, house_id, deleted=False):
+    """Invalidate cached listings and update the search index after a committed house write"""
+    bump_inventory_generation()
+    bump_search_generation()
+    try:
+        if deleted:
+            unindex_house(house_id)
+        else:
+            index_house(conn, house_id)
+    except Exception as e:
+        # Other workers catch up from the database anyway; never fail the write over it
+        logger.error("Search index update failed for house %s: %s", house_id, e)
+
+
 # Separate dashboard routes for admin and landlord
 @admin_bp.route('/admin-dashboard')
 @admin_only
 def admin_dashboard():
     """Admin-only dashboard with user metrics"""
-    conn = get_db_connection()
+    conn = get_db(read_only=True)
     cursor = conn.cursor(dictionary=True)
 
     try:
@@ -211,7 +231,6 @@ def admin_dashboard():
         }
     finally:
         cursor.close()
-        conn.close()
 
     return render_template('admin/dashboard.html', users_count=metrics['total_users'], metrics=metrics)
 
@@ -220,36 +239,39 @@ def admin_dashboard():
 @landlord_only
 def landlord_dashboard():
     """Landlord-only dashboard"""
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    conn = get_db(read_only=True)
+    cursor = conn.cursor()
 
     # Get only the landlord's properties
-    cursor.execute("""
+    query = """
         SELECT h.*, r.name as region_name, n.name as neighborhood_name
         FROM houses h
         LEFT JOIN regions r ON h.region_id = r.id
         LEFT JOIN neighborhoods n ON h.neighborhood_id = n.id
         WHERE h.created_by = %s
-        ORDER BY h.created_at DESC
-    """, (session['user_id'],))
-
-    properties = cursor.fetchall()
-
-    # Parse image_paths for each property
-    for prop in properties:
-        if prop['image_paths']:
-            try:
-                if isinstance(prop['image_paths'], str):
-                    prop['image_paths'] = json.loads(prop['image_paths'].replace("'", '"'))
-            except:
-                prop['image_paths'] = [prop['image_paths']] if prop['image_paths'] else []
-        else:
-            prop['image_paths'] = []
+    """
+    page = paginate(cursor, query, [session['user_id']], hydrate=hydrate_houses)
+    properties = page.items
+
+    # Uploads still being processed (polled by the page via image_jobs)
+    jobs = jobs_for_user(cursor, session['user_id'])
 
     cursor.close()
-    conn.close()
 
-    return render_template('landlord/dashboard.html', properties=properties)
+    return render_template('landlord/dashboard.html', properties=properties, page=page, jobs=jobs)
+
+
+@admin_bp.route('/image-jobs')
+@admin_required
+def image_jobs():
+    """JSON status of the current user's image processing jobs"""
+    # Progress is written by the image workers, not this user's session, so
+    # the read-your-writes window doesn't cover it: poll the primary
+    conn = get_db()
+    cursor = conn.cursor()
+    jobs = jobs_for_user(cursor, session['user_id'])
+    cursor.close()
+    return jsonify({'jobs': jobs})
 
 
 # Main dashboard route that redirects based on role
@@ -268,17 +290,14 @@ def dashboard():
 @admin_only
 def add_house():
     """Admin-only: Add house (full access)"""
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    # Get regions and neighborhoods for dropdowns
-    cursor.execute("SELECT * FROM regions")
-    regions = cursor.fetchall()
-
-    cursor.execute("SELECT * FROM neighborhoods")
-    neighborhoods = cursor.fetchall()
+    # Get regions and neighborhoods for dropdowns (cached reference data)
+    regions = get_regions()
+    neighborhoods = get_neighborhoods()
 
     if request.method == 'POST':
+        conn = get_db()
+        cursor = conn.cursor(dictionary=True)
+
         try:
             # Get form data
             title = request.form['title']
@@ -297,36 +316,30 @@ def add_house():
             contact_phone = request.form.get('contact_phone')
             contact_email = request.form.get('contact_email')
 
-            # Insert house into database
+            # Insert house into database; the placeholder image shows until
+            # the image job has processed the uploads
             cursor.execute("""
                 INSERT INTO houses 
                 (title, description, region_id, neighborhood_id, exact_location, 
                  property_type, completion_status, months_left, price, created_by, is_featured,
-                 contact_name, contact_phone, contact_email)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                 contact_name, contact_phone, contact_email, image_paths)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
             """, (title, description, region_id, neighborhood_id, exact_location,
                   property_type, completion_status, months_left, price, session['user_id'], is_featured,
-                  contact_name, contact_phone, contact_email))
+                  contact_name, contact_phone, contact_email, dump_image_paths([PLACEHOLDER_IMAGE])))
 
             house_id = cursor.lastrowid
 
-            # Handle image uploads
-            image_paths = []
-            if 'images' in request.files:
-                files = request.files.getlist('images')
-                image_paths = save_uploaded_files(files, house_id)
-
-            # If no images uploaded, use placeholder
-            if not image_paths:
-                image_paths = ['house_placeholder.jpg']
-
-            # Update house with image paths
-            cursor.execute("""
-                UPDATE houses SET image_paths = %s WHERE id = %s
-            """, (json.dumps(image_paths), house_id))
+            # Handle image uploads (form files and finished chunked uploads)
+            image_paths = save_uploaded_files(conn, request.files.getlist('images'),
+                                              request.form.getlist('upload_ids'))
+            job_id = enqueue_image_job(cursor, house_id, session['user_id'], image_paths)
 
             conn.commit()
-            flash(f'House added successfully with {len(image_paths)} images!', 'success')
+            after_house_write(conn, house_id)
+            if job_id:
+                kick_image_workers()
+            flash(f'House added successfully! {len(image_paths)} images are being processed.', 'success')
             return redirect(url_for('admin.manage_houses'))
 
         except Exception as e:
@@ -334,11 +347,6 @@ def add_house():
             flash(f'Error adding house: {str(e)}', 'error')
         finally:
             cursor.close()
-            conn.close()
-
-    else:
-        cursor.close()
-        conn.close()
 
     return render_template('admin/add_house.html',
                            regions=regions,
@@ -350,17 +358,14 @@ def add_house():
 @landlord_only
 def landlord_add_property():
     """Landlord-only: Add property (restricted access)"""
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    # Get regions and neighborhoods for dropdowns
-    cursor.execute("SELECT * FROM regions")
-    regions = cursor.fetchall()
-
-    cursor.execute("SELECT * FROM neighborhoods")
-    neighborhoods = cursor.fetchall()
+    # Get regions and neighborhoods for dropdowns (cached reference data)
+    regions = get_regions()
+    neighborhoods = get_neighborhoods()
 
     if request.method == 'POST':
+        conn = get_db()
+        cursor = conn.cursor(dictionary=True)
+
         try:
             # Get form data
             title = request.form['title']
@@ -381,36 +386,31 @@ def landlord_add_property():
             contact_phone = request.form.get('contact_phone')
             contact_email = request.form.get('contact_email')
 
-            # Insert house into database
+            # Insert house into database; the placeholder image shows until
+            # the image job has processed the uploads
             cursor.execute("""
                 INSERT INTO houses 
                 (title, description, region_id, neighborhood_id, exact_location, 
                  property_type, completion_status, months_left, price, created_by, is_featured,
-                 contact_name, contact_phone, contact_email)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                 contact_name, contact_phone, contact_email, image_paths)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
             """, (title, description, region_id, neighborhood_id, exact_location,
                   property_type, completion_status, months_left, price, session['user_id'], is_featured,
-                  contact_name, contact_phone, contact_email))
+                  contact_name, contact_phone, contact_email, dump_image_paths([PLACEHOLDER_IMAGE])))
 
             house_id = cursor.lastrowid
 
-            # Handle image uploads
-            image_paths = []
-            if 'images' in request.files:
-                files = request.files.getlist('images')
-                image_paths = save_uploaded_files(files, house_id)
-
-            # If no images uploaded, use placeholder
-            if not image_paths:
-                image_paths = ['house_placeholder.jpg']
-
-            # Update house with image paths
-            cursor.execute("""
-                UPDATE houses SET image_paths = %s WHERE id = %s
-            """, (json.dumps(image_paths), house_id))
+            # Handle image uploads (form files and finished chunked uploads)
+            image_paths = save_uploaded_files(conn, request.files.getlist('images'),
+                                              request.form.getlist('upload_ids'))
+            job_id = enqueue_image_job(cursor, house_id, session['user_id'], image_paths)
 
             conn.commit()
-            flash('Property added successfully!', 'success')
+            after_house_write(conn, house_id)
+            if job_id:
+                kick_image_workers()
+            flash('Property added successfully! Photos will appear once they are processed.' if image_paths
+                  else 'Property added successfully!', 'success')
             return redirect(url_for('admin.landlord_dashboard'))
 
         except Exception as e:
@@ -418,11 +418,6 @@ def landlord_add_property():
             flash(f'Error adding property: {str(e)}', 'error')
         finally:
             cursor.close()
-            conn.close()
-
-    else:
-        cursor.close()
-        conn.close()
 
     return render_template('landlord/add_property.html',
                            regions=regions,
@@ -433,24 +428,21 @@ def landlord_add_property():
 @landlord_only
 def landlord_edit_property(property_id):
     """Landlord-only: Edit property (only their own)"""
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    conn = get_db()
+    cursor = conn.cursor()
 
     # Verify the property belongs to this landlord
     cursor.execute("SELECT * FROM houses WHERE id = %s AND created_by = %s",
                    (property_id, session['user_id']))
-    property = cursor.fetchone()
+    property = hydrate_house(cursor)
 
     if not property:
         flash('Property not found or access denied.', 'error')
         return redirect(url_for('admin.landlord_dashboard'))
 
-    # Get regions and neighborhoods for dropdowns
-    cursor.execute("SELECT * FROM regions")
-    regions = cursor.fetchall()
-
-    cursor.execute("SELECT * FROM neighborhoods")
-    neighborhoods = cursor.fetchall()
+    # Get regions and neighborhoods for dropdowns (cached reference data)
+    regions = get_regions()
+    neighborhoods = get_neighborhoods()
 
     if request.method == 'POST':
         try:
@@ -473,28 +465,26 @@ def landlord_edit_property(property_id):
             contact_phone = request.form.get('contact_phone')
             contact_email = request.form.get('contact_email')
 
-            # Get current image paths
-            current_images = []
-            if property['image_paths']:
-                try:
-                    if isinstance(property['image_paths'], str):
-                        current_images = json.loads(property['image_paths'].replace("'", '"'))
-                except:
-                    current_images = [property['image_paths']] if property['image_paths'] else []
+            # Handle new image uploads (attached by the image job once processed)
+            new_images = save_uploaded_files(conn, request.files.getlist('images'),
+                                             request.form.getlist('upload_ids'))
+
+            # Lock the row and take the current image paths from it, so an
+            # image job finishing meanwhile doesn't lose its photos to this write
+            cursor.execute("SELECT image_paths FROM houses WHERE id = %s AND created_by = %s FOR UPDATE",
+                           (property_id, session['user_id']))
+            current_data = cursor.fetchone()
+            current_images = parse_image_paths(current_data[0]) if current_data else []
 
             # Handle image deletions
             delete_images = request.form.getlist('delete_images')
             updated_images = [img for img in current_images if img not in delete_images]
-
-            # Handle new image uploads
-            if 'images' in request.files:
-                files = request.files.getlist('images')
-                new_images = save_uploaded_files(files, property_id)
-                updated_images.extend(new_images)
+            removed_images = [img for img in current_images if img in delete_images]
+            queue_release(cursor, removed_images)
 
             # If no images left, use placeholder
             if not updated_images:
-                updated_images = ['house_placeholder.jpg']
+                updated_images = [PLACEHOLDER_IMAGE]
 
             # Update property in database
             cursor.execute("""
@@ -507,10 +497,16 @@ def landlord_edit_property(property_id):
                 WHERE id = %s AND created_by = %s
             """, (title, description, region_id, neighborhood_id, exact_location,
                   property_type, completion_status, months_left, price, is_featured,
-                  json.dumps(updated_images), contact_name, contact_phone, contact_email,
+                  dump_image_paths(updated_images), contact_name, contact_phone, contact_email,
                   property_id, session['user_id']))
+            job_id = enqueue_image_job(cursor, property_id, session['user_id'], new_images)
 
             conn.commit()
+            after_house_write(conn, property_id)
+            if job_id:
+                kick_image_workers()
+            if removed_images:
+                kick_sweeper()
             flash('Property updated successfully!', 'success')
             return redirect(url_for('admin.landlord_dashboard'))
 
@@ -519,27 +515,10 @@ def landlord_edit_property(property_id):
             flash(f'Error updating property: {str(e)}', 'error')
         finally:
             cursor.close()
-            conn.close()
 
     else:
-        # GET request - load existing property data
-        try:
-            # Parse image_paths if it's a string
-            if property['image_paths']:
-                try:
-                    if isinstance(property['image_paths'], str):
-                        property['image_paths'] = json.loads(property['image_paths'].replace("'", '"'))
-                except:
-                    property['image_paths'] = [property['image_paths']] if property['image_paths'] else []
-            else:
-                property['image_paths'] = []
-
-        except Exception as e:
-            flash(f'Error loading property: {str(e)}', 'error')
-            return redirect(url_for('admin.landlord_dashboard'))
-        finally:
-            cursor.close()
-            conn.close()
+        # GET request - the property was already loaded above
+        cursor.close()
 
     return render_template('landlord/edit_property.html',
                            property=property,
@@ -551,12 +530,13 @@ def landlord_edit_property(property_id):
 @landlord_only
 def landlord_delete_property(property_id):
     """Landlord-only: Delete property (only their own)"""
-    conn = get_db_connection()
+    conn = get_db()
     cursor = conn.cursor()
 
     try:
-        # Verify the property belongs to this landlord before deleting
-        cursor.execute("SELECT * FROM houses WHERE id = %s AND created_by = %s",
+        # Verify the property belongs to this landlord before deleting (the
+        # row lock keeps an image job from attaching photos meanwhile)
+        cursor.execute("SELECT image_paths FROM houses WHERE id = %s AND created_by = %s FOR UPDATE",
                        (property_id, session['user_id']))
         property = cursor.fetchone()
 
@@ -564,22 +544,22 @@ def landlord_delete_property(property_id):
             flash('Property not found or access denied.', 'error')
             return redirect(url_for('admin.landlord_dashboard'))
 
-        # Delete house images folder if exists
-        import shutil
-        house_folder = f'static/uploads/house_{property_id}'
-        if os.path.exists(house_folder):
-            shutil.rmtree(house_folder)
+        # Files are released by the background sweeper; images shared with
+        # other listings stay
+        queue_release(cursor, parse_image_paths(property[0]))
 
         cursor.execute("DELETE FROM houses WHERE id = %s AND created_by = %s",
                        (property_id, session['user_id']))
+        record_deletion(cursor, property_id)
         conn.commit()
+        after_house_write(conn, property_id, deleted=True)
+        kick_sweeper()
         flash('Property deleted successfully!', 'success')
     except Exception as e:
         conn.rollback()
         flash(f'Error deleting property: {str(e)}', 'error')
     finally:
         cursor.close()
-        conn.close()
 
     return redirect(url_for('admin.landlord_dashboard'))
 
@@ -589,50 +569,39 @@ def landlord_delete_property(property_id):
 @admin_only
 def manage_houses():
     """Admin-only: Manage all houses"""
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    conn = get_db(read_only=True)
+    cursor = conn.cursor()
 
-    # Get all houses with region and neighborhood names
-    cursor.execute("""
+    # Get one page of houses with region and neighborhood names
+    query = """
         SELECT h.*, r.name as region_name, n.name as neighborhood_name, u.username as created_by_name
         FROM houses h
         LEFT JOIN regions r ON h.region_id = r.id
         LEFT JOIN neighborhoods n ON h.neighborhood_id = n.id
         LEFT JOIN users u ON h.created_by = u.id
-        ORDER BY h.created_at DESC
-    """)
-    houses = cursor.fetchall()
-
-    # Parse image_paths for each house
-    for house in houses:
-        if house['image_paths']:
-            try:
-                if isinstance(house['image_paths'], str):
-                    house['image_paths'] = json.loads(house['image_paths'].replace("'", '"'))
-            except:
-                house['image_paths'] = [house['image_paths']] if house['image_paths'] else []
-        else:
-            house['image_paths'] = []
+        WHERE 1=1
+    """
+    page = paginate(cursor, query, [], hydrate=hydrate_houses)
+    houses = page.items
 
     cursor.close()
-    conn.close()
 
-    return render_template('admin/manage_houses.html', houses=houses)
+    # Same cached count /houses shows when no filter is set
+    total = count_houses(None, None, None, None, inventory_generation())
+
+    return render_template('admin/manage_houses.html', houses=houses, page=page, total=total)
 
 
 @admin_bp.route('/edit-house/<int:house_id>', methods=['GET', 'POST'])
 @admin_only
 def edit_house(house_id):
     """Admin-only: Edit any house"""
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    # Get regions and neighborhoods for dropdowns
-    cursor.execute("SELECT * FROM regions")
-    regions = cursor.fetchall()
+    conn = get_db()
+    cursor = conn.cursor()
 
-    cursor.execute("SELECT * FROM neighborhoods")
-    neighborhoods = cursor.fetchall()
+    # Get regions and neighborhoods for dropdowns (cached reference data)
+    regions = get_regions()
+    neighborhoods = get_neighborhoods()
 
     if request.method == 'POST':
         try:
@@ -654,30 +623,24 @@ def edit_house(house_id):
             contact_phone = request.form.get('contact_phone')
             contact_email = request.form.get('contact_email')
 
-            # Get current image paths
-            cursor.execute("SELECT image_paths FROM houses WHERE id = %s", (house_id,))
-            current_data = cursor.fetchone()
-            current_images = []
+            # Handle new image uploads (attached by the image job once processed)
+            new_images = save_uploaded_files(conn, request.files.getlist('images'),
+                                             request.form.getlist('upload_ids'))
 
-            if current_data and current_data['image_paths']:
-                try:
-                    if isinstance(current_data['image_paths'], str):
-                        current_images = json.loads(current_data['image_paths'].replace("'", '"'))
-                except:
-                    current_images = [current_data['image_paths']] if current_data['image_paths'] else []
+            # Lock the row and take the current image paths from it, so an
+            # image job finishing meanwhile doesn't lose its photos to this write
+            cursor.execute("SELECT image_paths FROM houses WHERE id = %s FOR UPDATE", (house_id,))
+            current_data = cursor.fetchone()
+            current_images = parse_image_paths(current_data[0]) if current_data else []
 
             # Remove deleted images
             updated_images = [img for img in current_images if img not in delete_images]
-
-            # Handle new image uploads
-            if 'images' in request.files:
-                files = request.files.getlist('images')
-                new_images = save_uploaded_files(files, house_id)
-                updated_images.extend(new_images)
+            removed_images = [img for img in current_images if img in delete_images]
+            queue_release(cursor, removed_images)
 
             # If no images left, use placeholder
             if not updated_images:
-                updated_images = ['house_placeholder.jpg']
+                updated_images = [PLACEHOLDER_IMAGE]
 
             # Update house in database
             cursor.execute("""
@@ -690,9 +653,15 @@ def edit_house(house_id):
                 WHERE id = %s
             """, (title, description, region_id, neighborhood_id, exact_location,
                   property_type, completion_status, months_left, price, is_featured,
-                  json.dumps(updated_images), contact_name, contact_phone, contact_email, house_id))
+                  dump_image_paths(updated_images), contact_name, contact_phone, contact_email, house_id))
+            job_id = enqueue_image_job(cursor, house_id, session['user_id'], new_images)
 
             conn.commit()
+            after_house_write(conn, house_id)
+            if job_id:
+                kick_image_workers()
+            if removed_images:
+                kick_sweeper()
             flash('House updated successfully!', 'success')
             return redirect(url_for('admin.manage_houses'))
 
@@ -701,34 +670,22 @@ def edit_house(house_id):
             flash(f'Error updating house: {str(e)}', 'error')
         finally:
             cursor.close()
-            conn.close()
 
     else:
         # GET request - load existing house data
         try:
             cursor.execute("SELECT * FROM houses WHERE id = %s", (house_id,))
-            house = cursor.fetchone()
+            house = hydrate_house(cursor)
 
             if not house:
                 flash('House not found!', 'error')
                 return redirect(url_for('admin.manage_houses'))
 
-            # Parse image_paths if it's a string
-            if house['image_paths']:
-                try:
-                    if isinstance(house['image_paths'], str):
-                        house['image_paths'] = json.loads(house['image_paths'].replace("'", '"'))
-                except:
-                    house['image_paths'] = [house['image_paths']] if house['image_paths'] else []
-            else:
-                house['image_paths'] = []
-
         except Exception as e:
             flash(f'Error loading house: {str(e)}', 'error')
             return redirect(url_for('admin.manage_houses'))
         finally:
             cursor.close()
-            conn.close()
 
     return render_template('admin/edit_house.html',
                            house=house,
@@ -740,25 +697,28 @@ def edit_house(house_id):
 @admin_only
 def delete_house(house_id):
     """Admin-only: Delete any house"""
-    conn = get_db_connection()
+    conn = get_db()
     cursor = conn.cursor()
 
     try:
-        # Delete house images folder if exists
-        import shutil
-        house_folder = f'static/uploads/house_{house_id}'
-        if os.path.exists(house_folder):
-            shutil.rmtree(house_folder)
+        # Files are released by the background sweeper; images shared with
+        # other listings stay
+        cursor.execute("SELECT image_paths FROM houses WHERE id = %s FOR UPDATE", (house_id,))
+        house = cursor.fetchone()
+        if house:
+            queue_release(cursor, parse_image_paths(house[0]))
 
         cursor.execute("DELETE FROM houses WHERE id = %s", (house_id,))
+        record_deletion(cursor, house_id)
         conn.commit()
+        after_house_write(conn, house_id, deleted=True)
+        kick_sweeper()
         flash('House deleted successfully!', 'success')
     except Exception as e:
         conn.rollback()
         flash(f'Error deleting house: {str(e)}', 'error')
     finally:
         cursor.close()
-        conn.close()
 
     return redirect(url_for('admin.manage_houses'))
 
@@ -767,24 +727,26 @@ def delete_house(house_id):
 @admin_only
 def manage_users():
     """Admin-only: Manage users"""
-    conn = get_db_connection()
+    conn = get_db(read_only=True)
     cursor = conn.cursor(dictionary=True)
 
-    # Get all users
-    cursor.execute("SELECT * FROM users ORDER BY created_at DESC")
-    users = cursor.fetchall()
+    # Get one page of users, newest first
+    page = paginate(cursor, "SELECT * FROM users u WHERE 1=1", [], alias='u')
+    users = page.items
+
+    cursor.execute("SELECT COUNT(*) AS total FROM users")
+    total = cursor.fetchone()['total']
 
     cursor.close()
-    conn.close()
 
-    return render_template('admin/manage_users.html', users=users)
+    return render_template('admin/manage_users.html', users=users, page=page, total=total)
 
 
 @admin_bp.route('/edit-user/<int:user_id>', methods=['GET', 'POST'])
 @admin_only
 def edit_user(user_id):
     """Admin-only: Edit users"""
-    conn = get_db_connection()
+    conn = get_db()
     cursor = conn.cursor(dictionary=True)
 
     if request.method == 'POST':
@@ -812,7 +774,6 @@ def edit_user(user_id):
             flash(f'Error updating user: {str(e)}', 'error')
         finally:
             cursor.close()
-            conn.close()
 
     else:
         # GET request - load user data
@@ -829,7 +790,6 @@ def edit_user(user_id):
             return redirect(url_for('admin.manage_users'))
         finally:
             cursor.close()
-            conn.close()
 
     return render_template('admin/edit_user.html', user=user)
 
@@ -843,7 +803,7 @@ def delete_user(user_id):
         flash('You cannot delete your own account!', 'error')
         return redirect(url_for('admin.manage_users'))
 
-    conn = get_db_connection()
+    conn = get_db()
     cursor = conn.cursor()
 
     try:
@@ -855,8 +815,100 @@ def delete_user(user_id):
         flash(f'Error deleting user: {str(e)}', 'error')
     finally:
         cursor.close()
-        conn.close()
 
 
     return redirect(url_for('admin.manage_users'))
 
+
+@admin_bp.route('/export/houses')
+@admin_only
+def export_houses():
+    """Admin-only: download listings as CSV or NDJSON (?format=), with the /houses filters"""
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f"format must be one of {', '.join(EXPORT_FORMATS)}"}), 400
+    clauses, params = house_filter_sql(*browse_filters(request.args))
+    return stream_houses_export(clauses, params, fmt)
+
+
+@admin_bp.route('/export/users')
+@admin_only
+def export_users():
+    """Admin-only: download users as CSV or NDJSON (?format=, optional ?role=)"""
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f"format must be one of {', '.join(EXPORT_FORMATS)}"}), 400
+    return stream_users_export(request.args.get('role', '').strip(), fmt)
+
+
+@admin_bp.route('/cache-stats')
+@admin_only
+def cache_stats():
+    """Admin-only: hit/miss counters of this worker's caches, for sizing them"""
+    return jsonify({name: cache.stats() for name, cache in CACHES.items()})
+
+
+# Chunked, resumable image uploads: POST to start, PUT chunks at an offset,
+# then either submit the house form with the upload ids or finalize here
+@admin_bp.route('/uploads', methods=['POST'])
+@admin_required
+def create_upload():
+    data = request.get_json(silent=True) or {}
+    filename = data.get('filename', '')
+    if not allowed_file(filename):
+        return jsonify({'error': 'Unsupported file type'}), 400
+    try:
+        size = int(data.get('size', 0))
+        upload = create_upload_session(session['user_id'], filename.rsplit('.', 1)[1].lower(), size)
+    except ValueError:
+        return jsonify({'error': 'Invalid size'}), 400
+    except UploadError as e:
+        return jsonify({'error': str(e)}), e.status
+    return jsonify(upload), 201
+
+
+@admin_bp.route('/uploads/<upload_id>', methods=['GET'])
+@admin_required
+def upload_status(upload_id):
+    try:
+        return jsonify(upload_session_status(upload_id, session['user_id']))
+    except UploadError as e:
+        return jsonify({'error': str(e)}), e.status
+
+
+@admin_bp.route('/uploads/<upload_id>', methods=['PUT'])
+@admin_required
+def upload_chunk(upload_id):
+    """Append a chunk; the body is streamed to disk, never buffered"""
+    try:
+        return jsonify(write_chunk(upload_id, session['user_id'], request.args.get('offset', type=int),
+                                   request.stream, request.content_length))
+    except UploadError as e:
+        return jsonify({'error': str(e), 'offset': e.offset}), e.status
+
+
+@admin_bp.route('/uploads/<upload_id>/finalize', methods=['POST'])
+@admin_required
+def finalize_upload_to_house(upload_id):
+    """Attach a complete upload to an existing house (processed by an image job)"""
+    house_id = (request.get_json(silent=True) or {}).get('house_id')
+    conn = get_db()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("SELECT created_by FROM houses WHERE id = %s", (house_id,))
+        house = cursor.fetchone()
+        if not house or (session.get('role') != 'admin' and house[0] != session['user_id']):
+            return jsonify({'error': 'Property not found or access denied'}), 404
+
+        path = finalize_upload(conn, upload_id, session['user_id'])
+        job_id = enqueue_image_job(cursor, house_id, session['user_id'], [path])
+        conn.commit()
+    except UploadError as e:
+        conn.rollback()
+        return jsonify({'error': str(e), 'offset': e.offset}), e.status
+    finally:
+        cursor.close()
+
+    kick_image_workers()
+    return jsonify({'path': path, 'job_id': job_id})
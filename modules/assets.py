@@ -0,0 +1,152 @@
+from flask import abort, request, send_file, url_for
+from modules.images import is_variant
+from modules.storage import IMMUTABLE_CACHE_CONTROL
+from werkzeug.security import safe_join
+import hashlib
+import json
+import mimetypes
+import os
+import re
+
+# Static files are linked by content-hash URLs (/assets/css/style.<hash>.css)
+# so browsers can cache them for a year without revalidating. The hashes,
+# and the .br/.gz copies served to clients that accept them, are produced
+# ahead of time by build_assets.py; files missing from the manifest are
+# hashed on first use instead.
+STATIC_FOLDER = 'static'
+MANIFEST_NAME = 'assets-manifest.json'
+
+# User uploads are served by the storage backend, not as assets
+SKIP_DIRS = {'uploads'}
+
+# Preference order when a client accepts several
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+
+HASH_LENGTH = 12
+FINGERPRINT_RE = re.compile(r'^(?P<stem>.+)\.(?P<hash>[0-9a-f]{%d})(?P<ext>\.[^./]+)$' % HASH_LENGTH)
+
+# Variants of content-addressed uploads (modules.uploads) can be cached
+# forever too; originals are re-encoded once processed, so they revalidate
+IMMUTABLE_UPLOAD_PREFIX = 'uploads/blobs/'
+
+_manifest = {}
+_live_hashes = {}  # logical path -> (mtime, hash) for files not in the manifest
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def fingerprinted_name(filename, digest):
+    stem, ext = os.path.splitext(filename)
+    return f"{stem}.{digest}{ext}"
+
+
+def iter_assets(static_folder=STATIC_FOLDER):
+    """Logical paths of every fingerprintable file under static/"""
+    for root, dirs, names in os.walk(static_folder):
+        if root == static_folder:
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+        for name in names:
+            if name == MANIFEST_NAME or name.endswith(tuple(suffix for _, suffix in PRECOMPRESSED)):
+                continue
+            yield os.path.relpath(os.path.join(root, name), static_folder).replace(os.sep, '/')
+
+
+def load_manifest(static_folder=STATIC_FOLDER):
+    """Read build_assets.py's manifest, dropping entries for files changed since"""
+    global _manifest
+    try:
+        with open(os.path.join(static_folder, MANIFEST_NAME)) as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        manifest = {}
+    fresh = {}
+    for filename, entry in manifest.items():
+        try:
+            if os.stat(os.path.join(static_folder, filename)).st_mtime_ns == entry['mtime_ns']:
+                fresh[filename] = entry
+        except OSError:
+            pass
+    _manifest = fresh
+    return fresh
+
+
+def _current_hash(filename):
+    entry = _manifest.get(filename)
+    if entry:
+        return entry['hash']
+    full_path = safe_join(STATIC_FOLDER, filename)
+    try:
+        mtime = os.stat(full_path).st_mtime_ns
+    except (OSError, TypeError):
+        return None
+    cached = _live_hashes.get(filename)
+    if cached is None or cached[0] != mtime:
+        cached = _live_hashes[filename] = (mtime, file_hash(full_path))
+    return cached[1]
+
+
+def asset_url(filename):
+    """Content-hash URL of a static file (for templates)"""
+    digest = _current_hash(filename)
+    if digest is None:
+        return url_for('static', filename=filename)
+    return url_for('asset', filename=fingerprinted_name(filename, digest))
+
+
+def serve_asset(filename):
+    match = FINGERPRINT_RE.match(filename)
+    if not match:
+        abort(404)
+    logical = match['stem'] + match['ext']
+    if logical.split('/', 1)[0] in SKIP_DIRS:
+        abort(404)
+    full_path = safe_join(STATIC_FOLDER, logical)
+    if full_path is None or not os.path.isfile(full_path):
+        abort(404)
+
+    path, encoding = full_path, None
+    entry = _manifest.get(logical)
+    if entry:
+        for name, suffix in PRECOMPRESSED:
+            if name in entry['encodings'] and name in request.accept_encodings:
+                path, encoding = full_path + suffix, name
+                break
+
+    response = send_file(os.path.abspath(path), conditional=True,
+                         mimetype=mimetypes.guess_type(logical)[0] or 'application/octet-stream')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    if match['hash'] == _current_hash(logical):
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    else:
+        # A page rendered before a deploy asked for the old version; serve
+        # the current one, but don't let it be cached under the old hash
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def _is_immutable_upload(filename):
+    return filename.startswith(IMMUTABLE_UPLOAD_PREFIX) and is_variant(filename)
+
+
+def _cache_uploads(response):
+    if request.endpoint == 'static' and response.status_code == 200 \
+            and _is_immutable_upload((request.view_args or {}).get('filename', '')):
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+
+def init_app(app):
+    global STATIC_FOLDER
+    STATIC_FOLDER = app.static_folder
+    load_manifest(STATIC_FOLDER)
+    app.add_url_rule('/assets/<path:filename>', 'asset', serve_asset)
+    app.after_request(_cache_uploads)
+    app.jinja_env.globals.update(asset_url=asset_url)
@@ -1,5 +1,5 @@
 from flask import Blueprint, render_template, request, redirect, url_for, session, flash
-from modules.database import get_db_connection
+from modules.database import get_db
 from werkzeug.security import generate_password_hash, check_password_hash
 import re
 
@@ -38,7 +38,7 @@ def register():
             flash('Password must be at least 6 characters long!', 'error')
             return render_template('auth/register.html')
 
-        conn = get_db_connection()
+        conn = get_db()
         cursor = conn.cursor(dictionary=True)
 
         try:
@@ -70,7 +70,6 @@ def register():
             flash(f'Registration failed: {str(e)}', 'error')
         finally:
             cursor.close()
-            conn.close()
 
     return render_template('auth/register.html')
 
@@ -81,7 +80,7 @@ def login():
         password = request.form['password']
         user_type = request.form.get('user_type', 'tenant')  # tenant, landlord, admin
 
-        conn = get_db_connection()
+        conn = get_db(read_only=True)
         cursor = conn.cursor(dictionary=True)
 
         try:
@@ -130,7 +129,6 @@ def login():
             flash(f'Login error: {str(e)}', 'error')
         finally:
             cursor.close()
-            conn.close()
 
     return render_template('auth/login.html')
 
@@ -147,7 +145,7 @@ def profile():
         flash('Please login to view your profile.', 'error')
         return redirect(url_for('auth.login'))
 
-    conn = get_db_connection()
+    conn = get_db(read_only=True)
     cursor = conn.cursor(dictionary=True)
 
     try:
@@ -158,7 +156,6 @@ def profile():
         return redirect(url_for('user.index'))
     finally:
         cursor.close()
-        conn.close()
 
     return render_template('auth/profile.html', user=user)
 
@@ -168,7 +165,7 @@ def edit_profile():
         flash('Please login to edit your profile.', 'error')
         return redirect(url_for('auth.login'))
 
-    conn = get_db_connection()
+    conn = get_db()
     cursor = conn.cursor(dictionary=True)
 
     if request.method == 'POST':
@@ -242,7 +239,6 @@ def edit_profile():
             flash(f'Error updating profile: {str(e)}', 'error')
         finally:
             cursor.close()
-            conn.close()
 
     else:
         # GET request - load current user data
@@ -254,6 +250,5 @@ def edit_profile():
             return redirect(url_for('user.index'))
         finally:
             cursor.close()
-            conn.close()
 
     return render_template('auth/edit_profile.html', user=user)
@@ -0,0 +1,136 @@
+from collections import OrderedDict
+import os
+import sys
+import threading
+import time
+
+# Bumped on every house insert/update/delete. Kept in a file so all gunicorn
+# workers on a host see the same generation; reading it is a single stat().
+GENERATION_FILE = os.environ.get('INVENTORY_GENERATION_FILE',
+                                 os.path.join('instance', 'inventory.generation'))
+
+# Every LRUCache registers itself here so its counters can be inspected
+CACHES = {}
+
+
+def read_generation(path):
+    """Generation kept in the file at ``path`` (0 until it is first bumped)"""
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def bump_generation(path):
+    """Move the generation at ``path`` on, for every worker on this host"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'a'):
+        pass
+    # Strictly increasing even if two writes land in the same clock tick
+    stamp = max(time.time_ns(), read_generation(path) + 1)
+    os.utime(path, ns=(stamp, stamp))
+
+
+def inventory_generation():
+    """Current inventory generation (changes whenever a house is written)"""
+    return read_generation(GENERATION_FILE)
+
+
+def generation_age(generation):
+    """Seconds since ``generation`` was bumped (huge when it never was)"""
+    return time.time() - generation / 1e9
+
+
+def bump_inventory_generation():
+    """Invalidate every generation-tagged cache entry in every worker"""
+    bump_generation(GENERATION_FILE)
+
+
+def approx_size(value):
+    """Rough deep size in bytes of rows made of dicts/lists/scalars"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(approx_size(k) + approx_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(approx_size(v) for v in value)
+    elif hasattr(value, '__dict__'):
+        size += approx_size(vars(value))
+    elif hasattr(value, '__slots__'):
+        size += sum(approx_size(getattr(value, name)) for name in value.__slots__ if hasattr(value, name))
+    return size
+
+
+class LRUCache:
+    """Thread-safe LRU cache capped by approximate memory use.
+
+    Entries remember the generation they were computed under and count as
+    misses once the generation moves on or ``ttl`` seconds have passed.
+    """
+
+    def __init__(self, name, max_bytes, ttl=None):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (value, size, generation, stored_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        CACHES[name] = self
+
+    def get(self, key, generation=None):
+        """Return the cached value, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, size, entry_generation, stored_at = entry
+                expired = self.ttl is not None and time.monotonic() - stored_at > self.ttl
+                if entry_generation == generation and not expired:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._drop(key)
+            self.misses += 1
+            return None
+
+    def set(self, key, value, generation=None):
+        size = approx_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, size, generation, time.monotonic())
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+
+    def _drop(self, key):
+        _, size, _, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+            }
@@ -0,0 +1,174 @@
+from collections import namedtuple
+import re
+
+# What the chatbot understood from one message
+Intent = namedtuple('Intent', 'intent property_type budget')
+
+# Checked in this order: a message matching several intents gets the first
+INTENT_KEYWORDS = {
+    'greeting': ['hello', 'hi', 'hey', 'hola'],
+    'search': ['house', 'property', 'rent', 'room', 'apartment', 'looking for',
+               'need a', 'show me', 'find', 'want', 'store', 'shop', 'commercial',
+               'bedroom', 'self contained', 'chamber', 'single'],
+    'affirmative': ['yes', 'yeah', 'sure', 'ok', 'show me', 'please'],
+    'help': ['help', 'what can you do', 'how does this work'],
+    'contact': ['contact', 'landlord', 'owner', 'phone', 'email'],
+    'thanks': ['thank', 'thanks', 'appreciate'],
+}
+
+# Property type mapping
+PROPERTY_TYPE_MAPPING = {
+    'single_room': ['single room', 'single', 'room', 'one room'],
+    'chamber_hall': ['chamber', 'chamber hall', 'chamber and hall', 'hall'],
+    '2_bedroom': ['2 bedroom', '2-bedroom', 'two bedroom', '2 bed'],
+    '3_bedroom': ['3 bedroom', '3-bedroom', 'three bedroom', '3 bed'],
+    'self_contained': ['self contained', 'self-contained', 'self contain', 'selfcontained'],
+    'store': ['store', 'shop', 'commercial', 'business', 'retail'],
+    'apartment': ['apartment', 'flat', 'unit']
+}
+
+# A number right after one of these is the budget ("under 1000", "ghs 800")
+BUDGET_CUES = ['under', 'below', 'less than', 'not more than', 'budget', 'budget is',
+               'budget of', 'max', 'maximum', 'up to', 'for', 'ghs', 'gh', 'cedis']
+
+# ...and so is one followed by a currency ("800 cedis")
+CURRENCY_RE = r'gh[s₵¢]?|cedis?'
+
+# Nouns also match their plural ("rooms", "stores")
+PLURAL_KINDS = {'search', 'property_type'}
+
+AMOUNT_RE = r'\d[\d,]*'
+
+
+class _Meaning:
+    """Everything a matched phrase says, merged with the phrases inside it"""
+    __slots__ = ('intents', 'property_type', 'cue')
+
+    def __init__(self):
+        self.intents = 0  # bit n set = the n-th intent in INTENT_KEYWORDS
+        self.property_type = None  # (rank, value); a lower rank is more specific
+        self.cue = False
+
+    def add(self, kind, value, rank):
+        if kind == 'intent':
+            self.intents |= 1 << _INTENT_BITS[value]
+        elif kind == 'cue':
+            self.cue = True
+        elif self.property_type is None or rank < self.property_type[0]:
+            self.property_type = (rank, value)
+
+
+def _words(phrase):
+    return tuple(re.findall(r'[a-z0-9]+', phrase))
+
+
+def _contains(outer, inner):
+    return any(outer[i:i + len(inner)] == inner for i in range(len(outer) - len(inner) + 1))
+
+
+def _alternation(phrases):
+    """Regex alternation of ``phrases`` factored into a prefix trie, so the
+    engine rejects a position that can't start any phrase after one char"""
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def emit(node):
+        branches = [(r'\s+' if char == ' ' else re.escape(char)) + emit(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = '(?:' + '|'.join(branches) + ')'
+        return body + '?' if '' in node else body
+
+    return emit(trie)
+
+
+def _build():
+    """Compile one regex over every keyword, once at import.
+
+    Matches are whole words, which fixes the old substring tests ('hi'
+    fired inside 'this', 'room' inside 'bedroom'). Where keywords overlap the
+    regex takes the longest, and its meaning includes the shorter ones
+    inside it ('2 bedroom' is also the search word 'bedroom'). Numbers in
+    a keyword like '2 bedroom' are consumed by it, so they can't be
+    mistaken for a budget.
+    """
+    entries = []  # (phrase, kind, value, rank)
+    for intent, phrases in INTENT_KEYWORDS.items():
+        entries += [(p, 'intent', intent, 0) for p in phrases]
+    for order, (value, phrases) in enumerate(PROPERTY_TYPE_MAPPING.items()):
+        # Multi-word phrases are more specific; ties go to mapping order
+        entries += [(p, 'property_type', value, (-len(_words(p)), order)) for p in phrases]
+    entries += [(p + 's', kind, value, rank) for p, kind, value, rank in list(entries)
+                if kind in PLURAL_KINDS or value in PLURAL_KINDS]
+    entries += [(p, 'cue', None, 0) for p in BUDGET_CUES]
+
+    meanings = {}
+    for phrase, _, _, _ in entries:
+        if phrase not in meanings:
+            meaning = meanings[phrase] = _Meaning()
+            for inner, kind, value, rank in entries:
+                if _contains(_words(phrase), _words(inner)):
+                    meaning.add(kind, value, rank)
+
+    # The lookahead rejects most positions with one charset test before the
+    # lookbehind and the keyword trie are tried
+    first_chars = re.escape(''.join(sorted({p[0] for p in meanings})))
+    # ...and a number that starts a keyword ('2 bed') is never an amount
+    numeric = rf'(?!(?:{_alternation([p for p in meanings if p[0].isdigit()])})(?![a-z0-9]))'
+    pattern = (rf'(?=[{first_chars}0-9])(?<![a-z0-9])(?:'
+               rf'({_alternation(meanings)})(?![a-z0-9])(?:\s*{numeric}({AMOUNT_RE}))?'  # keyword [+ number]
+               rf'|({AMOUNT_RE})(?:\s*({CURRENCY_RE})(?![a-z]))?)')            # number [+ currency]
+    return re.compile(pattern), meanings
+
+
+_INTENT_BITS = {intent: bit for bit, intent in enumerate(INTENT_KEYWORDS)}
+_INTENTS = list(INTENT_KEYWORDS)
+_PATTERN, _MEANINGS = _build()
+
+# Every word the matcher knows, so place lookups don't read them as misspelled towns
+KEYWORDS = frozenset(word for phrase in _MEANINGS for word in _words(phrase))
+
+
+def parse_message(message):
+    """Intent, property type and budget from a single scan of ``message``.
+
+    When several property types are named, the most specific phrase wins,
+    then the one listed first in the mapping. A number after a budget cue
+    or followed by a currency beats a bare number; otherwise the first
+    number counts. Places are looked up separately, in modules.places.
+    """
+    intents = 0
+    property_type = None
+    cued_budget = bare_budget = None
+
+    for phrase, after_phrase, amount, currency in _PATTERN.findall(message.lower()):
+        if phrase:
+            meaning = _MEANINGS.get(phrase) or _MEANINGS[' '.join(phrase.split())]
+            intents |= meaning.intents
+            if meaning.property_type and (property_type is None or meaning.property_type < property_type):
+                property_type = meaning.property_type
+            if not after_phrase:
+                continue
+            amount, currency = after_phrase, meaning.cue
+        if currency:
+            if cued_budget is None:
+                cued_budget = int(amount.replace(',', ''))
+        elif bare_budget is None:
+            bare_budget = int(amount.replace(',', ''))
+
+    return Intent(
+        # Lowest set bit = the first intent in INTENT_KEYWORDS order
+        _INTENTS[(intents & -intents).bit_length() - 1] if intents else None,
+        property_type[1] if property_type else None,
+        cued_budget if cued_budget is not None else bare_budget,
+    )
+
+
+def get_property_type_display_name(property_type):
+    """Convert database property_type to readable format"""
+    return property_type.replace('_', ' ').title()
@@ -0,0 +1,144 @@
+from flask import request
+import os
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Text responses are gzip/brotli-compressed on the way out; the big pages
+# shrink to a fraction of their size, which matters most on mobile data.
+# Content types not listed here (images, archives...) go out untouched.
+# Override with COMPRESS_TYPES="text/html:6,application/json:4" (type:gzip level).
+# The levels only apply to gzip; brotli uses COMPRESS_BROTLI_QUALITY for every type.
+DEFAULT_LEVELS = {
+    'text/html': 6,
+    'text/css': 6,
+    'text/plain': 6,
+    'text/csv': 6,
+    'text/javascript': 6,
+    'application/javascript': 6,
+    'application/json': 6,
+    'application/x-ndjson': 6,
+    'image/svg+xml': 6,
+}
+
+
+def _parse_levels(value):
+    levels = {}
+    for item in value.split(','):
+        mimetype, _, level = item.strip().partition(':')
+        if mimetype:
+            levels[mimetype.lower()] = int(level) if level else 6
+    return levels
+
+
+LEVELS = _parse_levels(os.environ['COMPRESS_TYPES']) if os.environ.get('COMPRESS_TYPES') else DEFAULT_LEVELS
+
+# Below this the saving doesn't pay for the CPU and the extra header
+MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))
+
+# Dynamic pages favour speed: brotli quality 4 is about gzip -6 speed at a smaller size
+BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 4))
+
+# Formats that are compressed already; never worth another pass
+PRECOMPRESSED_PREFIXES = ('image/', 'video/', 'audio/', 'font/woff', 'application/zip',
+                          'application/gzip', 'application/pdf')
+
+# Never touch responses under these (the code serving them negotiates itself)
+SKIP_PATHS = ('/assets/',)
+
+
+class _Gzip:
+    def __init__(self, level):
+        # wbits 16+ writes the gzip header and trailer
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        return self._z.compress(data)
+
+    def flush(self):
+        """Everything so far, decodable by the client now (for streaming)"""
+        return self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._z.flush(zlib.Z_FINISH)
+
+
+class _Brotli:
+    def __init__(self):
+        self._c = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data):
+        return self._c.process(data)
+
+    def flush(self):
+        return self._c.flush()
+
+    def finish(self):
+        return self._c.finish()
+
+
+ENCODERS = {'gzip': _Gzip}
+if brotli is not None:
+    ENCODERS['br'] = _Brotli
+
+
+def _choose_encoding():
+    # Server preference breaks ties between equally acceptable encodings
+    return request.accept_encodings.best_match([e for e in ('br', 'gzip') if e in ENCODERS])
+
+
+def _stream(body, encoder):
+    """Compress a streamed body chunk by chunk, flushing after each one"""
+    try:
+        for chunk in body:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            if chunk:
+                yield encoder.compress(chunk) + encoder.flush()
+        yield encoder.finish()
+    finally:
+        if hasattr(body, 'close'):
+            body.close()
+
+
+def compress_response(response):
+    mimetype = (response.mimetype or '').lower()
+    if mimetype.startswith(PRECOMPRESSED_PREFIXES) or mimetype not in LEVELS:
+        return response
+    response.vary.add('Accept-Encoding')
+    if (response.status_code < 200 or response.status_code in (204, 206, 304)
+            or 'Content-Encoding' in response.headers
+            or 'no-transform' in response.headers.get('Cache-Control', '')
+            or request.path.startswith(SKIP_PATHS)):
+        return response
+
+    encoding = _choose_encoding()
+    if encoding is None:
+        return response
+    encoder = _Gzip(LEVELS[mimetype]) if encoding == 'gzip' else ENCODERS[encoding]()
+
+    if response.is_sequence:
+        data = response.get_data()
+        if len(data) < MIN_BYTES:
+            return response
+        response.set_data(encoder.compress(data) + encoder.finish())
+    else:
+        # Streamed (or file) bodies: sizes are unknown up front, so compress
+        # incrementally and let each chunk reach the client as it's produced
+        response.response = _stream(response.response, encoder)
+        response.direct_passthrough = False
+        response.headers.pop('Content-Length', None)
+
+    response.headers['Content-Encoding'] = encoding
+    # The body differs byte-for-byte from the identity one
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_app(app):
+    app.after_request(compress_response)
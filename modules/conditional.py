@@ -0,0 +1,69 @@
+from flask import make_response, request, session
+from modules.assets import iter_assets
+from modules.storage import get_storage
+from werkzeug.http import is_resource_modified
+import hashlib
+import os
+
+# Public pages carry an ETag built from whatever their content depends on,
+# so a client (or crawler) revisiting an unchanged page gets a bodiless 304
+# before the view queries or renders anything. Pages are still revalidated
+# on every visit (no-cache), never served stale.
+
+# Changes whenever the templates or static assets do, so a deploy
+# invalidates every page
+_release = ''
+
+
+def _release_of(template_folder, static_folder):
+    # Hash contents rather than mtimes so every host behind a load balancer agrees
+    files = [os.path.join(root, name)
+             for root, _, names in os.walk(template_folder) for name in names]
+    files += [os.path.join(static_folder, name) for name in iter_assets(static_folder)]
+    digest = hashlib.sha1()
+    for path in sorted(files):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def page_etag(*parts):
+    """ETag for a page built from ``parts`` as seen by the current visitor.
+
+    Returns None while flash messages are pending: the page about to be
+    rendered shows them once, so it must not be revalidated later.
+    """
+    if '_flashes' in session:
+        return None
+    # The navigation differs per visitor, so they are part of the tag
+    viewer = (session.get('logged_in'), session.get('role'), session.get('user_id'))
+    # Presigned image URLs expire, so a page embedding them can only be
+    # revalidated while they are still good
+    urls = get_storage().url_epoch()
+    return hashlib.sha1(repr((_release, viewer, urls) + parts).encode()).hexdigest()[:27]
+
+
+def not_modified(etag, last_modified=None):
+    """A 304 response if the client already has this version, else None"""
+    if etag is None or request.method not in ('GET', 'HEAD'):
+        return None
+    if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        return None
+    return with_validators(make_response('', 304), etag, last_modified)
+
+
+def with_validators(body, etag, last_modified=None):
+    """Response for ``body`` carrying the validators the next request will send back"""
+    response = make_response(body)
+    if etag is not None:
+        response.set_etag(etag)
+        if last_modified is not None:
+            response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'private, no-cache' if session.get('logged_in') else 'no-cache'
+    response.vary.add('Cookie')
+    return response
+
+
+def init_app(app):
+    global _release
+    _release = _release_of(os.path.join(app.root_path, app.template_folder), app.static_folder)
@@ -1,18 +1,241 @@
+from flask import g, has_request_context, session
+import logging
 import mysql.connector
 import os
+import queue
+import threading
+import time
 
-def get_db_connection():
-    try:
-        conn = mysql.connector.connect(
-            host=os.environ.get('MYSQL_HOST', 'localhost'),
-            user=os.environ.get('MYSQL_USER', 'root'),
-            password=os.environ.get('MYSQL_PASSWORD', ''),
-            database=os.environ.get('MYSQL_DB', 'rental_service'),
-            port=os.environ.get('MYSQL_PORT', 3306),
-            # Aiven requires SSL but we'll let the connector handle it automatically
-            use_pure=True
+logger = logging.getLogger(__name__)
+
+
+# Pool settings - one pool per gunicorn worker process
+POOL_SIZE = int(os.environ.get('MYSQL_POOL_SIZE', 5))
+POOL_TIMEOUT = float(os.environ.get('MYSQL_POOL_TIMEOUT', 10))  # seconds to wait for a free connection
+POOL_RECYCLE = float(os.environ.get('MYSQL_POOL_RECYCLE', 1800))  # max connection lifetime in seconds
+
+# Read replica - reads fall back to the primary when MYSQL_REPLICA_HOST is unset
+REPLICA_HOST = os.environ.get('MYSQL_REPLICA_HOST')
+# After a user commits, their reads stay on the primary for this many seconds
+READ_YOUR_WRITES_WINDOW = float(os.environ.get('MYSQL_READ_YOUR_WRITES_SECONDS', 10))
+
+
+class PoolExhaustedError(mysql.connector.Error):
+    """Raised when no pooled connection becomes free within POOL_TIMEOUT"""
+
+
+class PooledConnection:
+    """Wraps a MySQL connection so that close() hands it back to the pool"""
+
+    def __init__(self, pool, raw_conn):
+        self._pool = pool
+        self._conn = raw_conn
+        self.created_at = time.monotonic()
+        self.on_commit = None
+        self._after_commit = []
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def after_commit(self, callback):
+        """Run ``callback`` once the current transaction commits; a rollback drops it"""
+        self._after_commit.append(callback)
+
+    def commit(self):
+        self._conn.commit()
+        callbacks, self._after_commit = self._after_commit, []
+        for callback in callbacks:
+            callback()
+        if self.on_commit is not None:
+            self.on_commit()
+
+    def rollback(self):
+        self._after_commit = []
+        self._conn.rollback()
+
+    def close(self):
+        """Return the connection to the pool instead of tearing it down"""
+        conn = self.__dict__.get('_conn')
+        if conn is None:
+            return
+        self._conn = None
+        self._pool.release(conn, self.created_at)
+
+    def discard(self):
+        """Close the connection for good (e.g. with unread rows pending) and free its slot"""
+        conn = self.__dict__.get('_conn')
+        if conn is None:
+            return
+        self._conn = None
+        self._pool.discard(conn)
+
+    def __del__(self):
+        # A caller that forgot close() must not leak a pool slot
+        self.close()
+
+
+class ConnectionPool:
+    """Small thread-safe MySQL connection pool.
+
+    Connections are opened lazily up to ``size``, pinged on checkout,
+    recycled after ``recycle`` seconds and callers block for at most
+    ``timeout`` seconds when every connection is in use.
+    """
+
+    def __init__(self, connect_args, size=POOL_SIZE, timeout=POOL_TIMEOUT, recycle=POOL_RECYCLE):
+        self.connect_args = connect_args
+        self.size = size
+        self.timeout = timeout
+        self.recycle = recycle
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._pid = os.getpid()
+
+    def _check_fork(self):
+        # gunicorn forks workers after import; never share sockets with the parent
+        if self._pid != os.getpid():
+            self._idle = queue.LifoQueue()
+            self._slots = threading.BoundedSemaphore(self.size)
+            self._pid = os.getpid()
+
+    def _open(self):
+        return mysql.connector.connect(**self.connect_args)
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def acquire(self):
+        """Check out a healthy connection, opening a new one if needed"""
+        self._check_fork()
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolExhaustedError(
+                msg=f"Connection pool exhausted ({self.size} in use, waited {self.timeout}s)")
+
+        try:
+            while True:
+                try:
+                    conn, created_at = self._idle.get_nowait()
+                except queue.Empty:
+                    return PooledConnection(self, self._open())
+
+                # Recycle connections that outlived their max lifetime
+                if time.monotonic() - created_at > self.recycle:
+                    self._discard(conn)
+                    continue
+
+                # Ping on checkout so callers never get a dead socket
+                try:
+                    conn.ping(reconnect=True, attempts=1, delay=0)
+                except mysql.connector.Error:
+                    self._discard(conn)
+                    continue
+
+                pooled = PooledConnection(self, conn)
+                pooled.created_at = created_at
+                return pooled
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, conn, created_at):
+        """Put a connection back into the idle queue"""
+        try:
+            # Drop any transaction the caller left open
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put((conn, created_at))
+        except Exception:
+            self._discard(conn)
+        finally:
+            self._slots.release()
+
+    def discard(self, conn):
+        """Drop a checked-out connection instead of returning it"""
+        self._discard(conn)
+        self._slots.release()
+
+
+def _connect_args(replica=False):
+    args = dict(
+        host=os.environ.get('MYSQL_HOST', 'localhost'),
+        user=os.environ.get('MYSQL_USER', 'root'),
+        password=os.environ.get('MYSQL_PASSWORD', ''),
+        database=os.environ.get('MYSQL_DB', 'rental_service'),
+        port=os.environ.get('MYSQL_PORT', 3306),
+        # Aiven requires SSL but we'll let the connector handle it automatically
+        use_pure=True
+    )
+    if replica:
+        # Any MYSQL_REPLICA_* setting that is missing inherits the primary's value
+        args.update(
+            host=REPLICA_HOST,
+            user=os.environ.get('MYSQL_REPLICA_USER', args['user']),
+            password=os.environ.get('MYSQL_REPLICA_PASSWORD', args['password']),
+            database=os.environ.get('MYSQL_REPLICA_DB', args['database']),
+            port=os.environ.get('MYSQL_REPLICA_PORT', args['port']),
         )
-        return conn
+    return args
+
+
+_pools = {}
+_pool_lock = threading.Lock()
+
+
+def get_pool(replica=False):
+    replica = bool(replica and REPLICA_HOST)
+    if replica not in _pools:
+        with _pool_lock:
+            if replica not in _pools:
+                _pools[replica] = ConnectionPool(_connect_args(replica))
+    return _pools[replica]
+
+
+def get_db_connection(read_only=False):
+    try:
+        return get_pool(replica=read_only).acquire()
     except mysql.connector.Error as e:
-        print(f"Database connection error: {e}")
+        logger.error("Database connection error: %s", e)
         raise
+
+
+def mark_write():
+    """Pin this user's reads to the primary until the replica has caught up"""
+    if has_request_context():
+        session['db_write_at'] = time.time()
+
+
+def _recently_wrote():
+    return time.time() - session.get('db_write_at', 0) < READ_YOUR_WRITES_WINDOW
+
+
+def get_db(read_only=False):
+    """Return this request's connection, checking one out of the pool on first use.
+
+    ``read_only=True`` routes to the replica, unless the request already
+    holds a primary connection or the user committed within the
+    read-your-writes window.
+    """
+    if read_only and REPLICA_HOST and 'db' not in g and not _recently_wrote():
+        if 'db_replica' not in g:
+            g.db_replica = get_db_connection(read_only=True)
+        return g.db_replica
+
+    if 'db' not in g:
+        g.db = get_db_connection()
+        g.db.on_commit = mark_write
+    return g.db
+
+
+def close_db(exception=None):
+    """Hand the request's connections (if any) back to the pool"""
+    for key in ('db', 'db_replica'):
+        conn = g.pop(key, None)
+        if conn is not None:
+            conn.close()
+
+
+def init_app(app):
+    app.teardown_appcontext(close_db)
@@ -0,0 +1,138 @@
+from flask import Response, stream_with_context
+from datetime import date, datetime
+from decimal import Decimal
+from modules.database import get_db_connection
+from modules.hydration import parse_image_paths
+import csv
+import io
+import json
+
+# Exports stream straight from an unbuffered cursor: rows are fetched and
+# written FETCH_SIZE at a time, so memory stays flat however big the table.
+FETCH_SIZE = 500
+
+FORMATS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+HOUSES_QUERY = """
+    SELECT h.id, h.title, h.property_type, r.name AS region, n.name AS neighborhood,
+           h.exact_location, h.price, h.completion_status, h.months_left, h.is_featured,
+           h.views, u.username AS created_by, h.contact_name, h.contact_phone,
+           h.contact_email, h.image_paths, h.created_at, h.updated_at
+    FROM houses h
+    LEFT JOIN regions r ON h.region_id = r.id
+    LEFT JOIN neighborhoods n ON h.neighborhood_id = n.id
+    LEFT JOIN users u ON h.created_by = u.id
+    WHERE 1=1
+"""
+
+# Never export password hashes
+USERS_QUERY = """
+    SELECT u.id, u.username, u.email, u.full_name, u.phone, u.role, u.created_at
+    FROM users u
+    WHERE 1=1
+"""
+
+# Spreadsheet apps run cells starting with these as formulas
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _json_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode()
+    return value
+
+
+def _csv_value(value):
+    value = _json_value(value)
+    if isinstance(value, list):
+        value = ' '.join(value)
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _house_row(row):
+    row['image_paths'] = parse_image_paths(row['image_paths'])
+    return row
+
+
+def _encode_csv(columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def encode(rows):
+        for row in rows:
+            writer.writerow([_csv_value(row[column]) for column in columns])
+        chunk = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return chunk
+
+    writer.writerow(columns)
+    return encode, encode([])
+
+
+def _encode_ndjson(columns):
+    def encode(rows):
+        return ''.join(json.dumps({column: _json_value(row[column]) for column in columns},
+                                  ensure_ascii=False) + '\n' for row in rows)
+    return encode, ''
+
+
+ENCODERS = {'csv': _encode_csv, 'ndjson': _encode_ndjson}
+
+
+def stream_rows(query, params, fmt, transform=None):
+    """Yield ``query``'s result encoded as ``fmt``, one FETCH_SIZE batch per chunk"""
+    conn = get_db_connection(read_only=True)
+    finished = False
+    try:
+        cursor = conn.cursor(buffered=False)
+        cursor.execute(query, params)
+        columns = list(cursor.column_names)
+        encode, header = ENCODERS[fmt](columns)
+        if header:
+            yield header
+        while True:
+            rows = cursor.fetchmany(FETCH_SIZE)
+            if not rows:
+                break
+            rows = [dict(zip(columns, row)) for row in rows]
+            if transform is not None:
+                rows = [transform(row) for row in rows]
+            yield encode(rows)
+        finished = True
+    finally:
+        if finished:
+            cursor.close()
+            conn.close()
+        else:
+            # The client went away mid-export (or the query failed): the
+            # unread rest of the result makes this connection unusable
+            conn.discard()
+
+
+def export_response(name, query, params, fmt, transform=None):
+    body = stream_with_context(stream_rows(query, params, fmt, transform))
+    response = Response(body, mimetype=FORMATS[fmt])
+    filename = f"{name}-{datetime.now():%Y%m%d-%H%M}.{fmt}"
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+def export_houses(filter_clauses, params, fmt):
+    query = HOUSES_QUERY + filter_clauses + " ORDER BY h.id"
+    return export_response('houses', query, params, fmt, transform=_house_row)
+
+
+def export_users(role, fmt):
+    query, params = USERS_QUERY, []
+    if role:
+        query += " AND u.role = %s"
+        params.append(role)
+    return export_response('users', query + " ORDER BY u.id", params, fmt)
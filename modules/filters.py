@@ -0,0 +1,48 @@
+from decimal import Decimal, InvalidOperation
+
+
+def normalize_price(value):
+    """Canonical string for a price filter, or '' if it isn't a number"""
+    try:
+        price = Decimal(value.strip())
+    except (InvalidOperation, AttributeError):
+        return ''
+    return format(price.normalize(), 'f') if price.is_finite() else ''
+
+
+def browse_filters(args):
+    """(region, property_type, min_price, max_price) from /houses-style query args.
+
+    Normalized so equivalent URLs produce the same tuple (and cache key).
+    """
+    region_filter = args.get('region', '').strip()
+    if not region_filter.isdigit():
+        region_filter = ''
+    property_type_filter = args.get('property_type', '').strip()
+    min_price = normalize_price(args.get('min_price', ''))
+    max_price = normalize_price(args.get('max_price', ''))
+    return region_filter, property_type_filter, min_price, max_price
+
+
+def house_filter_sql(region_filter, property_type_filter, min_price, max_price, alias='h'):
+    """AND clauses and params applying the browse filters to ``houses``"""
+    clauses = ''
+    params = []
+
+    if region_filter:
+        clauses += f" AND {alias}.region_id = %s"
+        params.append(region_filter)
+
+    if property_type_filter:
+        clauses += f" AND {alias}.property_type = %s"
+        params.append(property_type_filter)
+
+    if min_price:
+        clauses += f" AND {alias}.price >= %s"
+        params.append(min_price)
+
+    if max_price:
+        clauses += f" AND {alias}.price <= %s"
+        params.append(max_price)
+
+    return clauses, params
@@ -0,0 +1,134 @@
+import json
+
+PLACEHOLDER_IMAGE = 'house_placeholder.jpg'
+
+
+def parse_image_paths(value):
+    """Decode a houses.image_paths value into a list of relative paths.
+
+    Rows written by migrate.py 0002 or later are plain JSON, so the fast
+    path is a single json.loads; older single-quoted lists and bare paths
+    are still understood.
+    """
+    if not value:
+        return []
+    if isinstance(value, list):
+        return value
+    if isinstance(value, (bytes, bytearray)):
+        value = value.decode()
+    try:
+        paths = json.loads(value)
+    except ValueError:
+        try:
+            # Legacy rows stored Python's repr of the list
+            paths = json.loads(value.replace("'", '"'))
+        except ValueError:
+            return [] if value.startswith('[') else [value]
+    if isinstance(paths, str):
+        return [paths]
+    return paths if isinstance(paths, list) else []
+
+
+def dump_image_paths(paths):
+    """Canonical stored form of an image path list"""
+    return json.dumps(list(paths))
+
+
+class House:
+    """A houses row (plus joined names) with image_paths decoded once.
+
+    Supports both ``house.title`` and ``house['title']`` so templates and
+    views written against dict rows keep working. Columns without a slot
+    (e.g. from ``SELECT h.*`` after a schema change) land in ``extra``.
+    """
+
+    __slots__ = (
+        'id', 'title', 'description', 'region_id', 'neighborhood_id', 'exact_location',
+        'property_type', 'completion_status', 'months_left', 'price', 'created_by',
+        'is_featured', 'image_paths', 'views', 'created_at', 'updated_at',
+        'contact_name', 'contact_phone', 'contact_email',
+        'region_name', 'neighborhood_name', 'created_by_name', 'extra',
+    )
+
+    def __init__(self, **columns):
+        self.extra = {}
+        for name, value in columns.items():
+            self[name] = value
+
+    def __getattr__(self, name):
+        # Only reached for unset slots and unknown columns
+        try:
+            return object.__getattribute__(self, 'extra')[name]
+        except (KeyError, AttributeError):
+            raise AttributeError(name) from None
+
+    def __getitem__(self, name):
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name) from None
+
+    def __setitem__(self, name, value):
+        if name == 'image_paths':
+            value = parse_image_paths(value)
+        if name in self.__slots__:
+            object.__setattr__(self, name, value)
+        else:
+            self.extra[name] = value
+
+    def __contains__(self, name):
+        return name in self.keys()
+
+    def get(self, name, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def keys(self):
+        names = [n for n in self.__slots__[:-1] if hasattr(self, n)]
+        return names + list(self.extra)
+
+    def to_dict(self):
+        return {name: self[name] for name in self.keys()}
+
+    def __repr__(self):
+        return f"<House {self.get('id')} {self.get('title')!r}>"
+
+
+_SLOTS = frozenset(House.__slots__) - {'extra'}
+
+
+def hydrate_houses(cursor):
+    """Fetch the cursor's remaining rows as House objects.
+
+    Expects a plain (tuple) cursor: values go straight into the slots,
+    which is cheaper than building a dict per row.
+    """
+    columns = tuple(cursor.column_names)
+    # Positions of columns without a slot; usually there are none
+    extras = [(i, name) for i, name in enumerate(columns) if name not in _SLOTS]
+    slot_names = tuple(name if name in _SLOTS else None for name in columns)
+    has_images = 'image_paths' in columns
+    houses = []
+    for row in cursor.fetchall():
+        house = object.__new__(House)
+        if extras:
+            house.extra = {name: row[i] for i, name in extras}
+            for name, value in zip(slot_names, row):
+                if name is not None:
+                    setattr(house, name, value)
+        else:
+            house.extra = {}
+            for name, value in zip(slot_names, row):
+                setattr(house, name, value)
+        if has_images:
+            house.image_paths = parse_image_paths(house.image_paths)
+        houses.append(house)
+    return houses
+
+
+def hydrate_house(cursor):
+    """Fetch a single row as a House, or None"""
+    houses = hydrate_houses(cursor)
+    return houses[0] if houses else None
@@ -0,0 +1,147 @@
+from flask import url_for
+from modules.cache import LRUCache
+from modules.hydration import PLACEHOLDER_IMAGE
+from modules.storage import get_storage
+from PIL import Image, ImageOps
+import os
+import tempfile
+
+# Resized copies written next to every upload: name -> max width in px
+VARIANTS = {'card': 480, 'detail': 1280}
+VARIANT_FORMAT = 'WEBP'
+VARIANT_EXT = 'webp'
+VARIANT_QUALITY = 80
+VARIANT_SUFFIXES = tuple(f'_{name}.{VARIANT_EXT}' for name in VARIANTS)
+
+# Originals are re-saved without metadata in their own format
+ORIGINAL_SAVE_OPTIONS = {'JPEG': {'quality': 92, 'optimize': True}, 'PNG': {'optimize': True}, 'WEBP': {'quality': 90}}
+
+# Widths of variant files known to exist, so templates don't stat() (or
+# HEAD, on S3) them on every render; misses are re-checked after a while
+MISSING_RECHECK_SECONDS = 60
+_variant_widths = LRUCache('variant_widths', max_bytes=2 * 1024 * 1024)
+_missing_variants = LRUCache('missing_variants', max_bytes=1024 * 1024, ttl=MISSING_RECHECK_SECONDS)
+
+
+def variant_path(path, name):
+    """Relative path of the ``name`` variant of an uploaded image"""
+    return f"{path.rsplit('.', 1)[0]}_{name}.{VARIANT_EXT}"
+
+
+def is_variant(path):
+    """True for a resized copy, which (unlike its original) is never rewritten"""
+    return path.endswith(VARIANT_SUFFIXES)
+
+
+def process_upload(path):
+    """Strip metadata from a saved upload and write its resized variants.
+
+    ``path`` is a storage path. Raises if the file isn't an image Pillow
+    can read, so callers can reject it.
+    """
+    storage = get_storage()
+    with storage.local_copy(path) as full_path:
+        return _process(storage, path, full_path)
+
+
+def _process(storage, path, full_path):
+    with Image.open(full_path) as img:
+        img.load()
+        source_format = img.format
+        animated = getattr(img, 'is_animated', False)
+        # Apply the camera's orientation before the EXIF that carries it is dropped
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGBA' if img.mode in ('LA', 'P', 'PA') else 'RGB')
+
+    # Re-encoding without exif=... drops EXIF/GPS from the original
+    if source_format in ORIGINAL_SAVE_OPTIONS and not animated:
+        original = img.convert('RGB') if source_format == 'JPEG' else img
+        # Write beside it and rename: the file may be hard-linked to an import's
+        # source, and another job may be re-saving the same shared blob
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(full_path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                original.save(f, source_format, **ORIGINAL_SAVE_OPTIONS[source_format])
+            os.replace(tmp_path, full_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        storage.put(path, full_path, move=False)
+
+    written = []
+    for name, width in VARIANTS.items():
+        variant = img.copy()
+        variant.thumbnail((width, width * 4), Image.LANCZOS)
+        relative = variant_path(path, name)
+        # Written next to the working copy, which for local storage is its final place
+        local_variant = variant_path(full_path, name)
+        variant.save(local_variant, VARIANT_FORMAT, quality=VARIANT_QUALITY, method=4)
+        storage.put(relative, local_variant, immutable=True)
+        # Small sources aren't upscaled, so the variant may be narrower than its name says
+        _variant_widths.set(relative, variant.width)
+        _missing_variants.delete(relative)
+        written.append(relative)
+    return written
+
+
+def is_processed(path):
+    """True once every variant of an upload has been written"""
+    storage = get_storage()
+    return all(storage.exists(variant_path(path, name)) for name in VARIANTS)
+
+
+def forget_variants(path):
+    """Drop cached existence of an upload's variants after deleting them"""
+    for name in VARIANTS:
+        _variant_widths.delete(variant_path(path, name))
+
+
+def _variant_width(relative):
+    """Pixel width of a variant file, or None if it doesn't exist (yet)"""
+    width = _variant_widths.get(relative)
+    if width is not None:
+        return width
+    if _missing_variants.get(relative):
+        return None
+    storage = get_storage()
+    if not storage.exists(relative):
+        _missing_variants.set(relative, True)
+        return None
+    # Written by another worker: only the header is read (a download on S3, once)
+    with storage.local_copy(relative) as full_path, Image.open(full_path) as img:
+        width = img.width
+    _variant_widths.set(relative, width)
+    return width
+
+
+def upload_url(path):
+    """URL of a stored upload (local static file, or a bucket / presigned URL)"""
+    if path == PLACEHOLDER_IMAGE:
+        return url_for('static', filename='uploads/' + path)
+    return get_storage().url(path)
+
+
+def image_url(path, variant=None):
+    """URL of an uploaded image, preferring the named variant when it exists"""
+    if variant and path != PLACEHOLDER_IMAGE:
+        relative = variant_path(path, variant)
+        if _variant_width(relative) is not None:
+            path = relative
+    return upload_url(path)
+
+
+def image_srcset(path):
+    """srcset listing the variants of an uploaded image that exist, at their real widths"""
+    candidates = {}
+    for name in VARIANTS:
+        relative = variant_path(path, name)
+        width = _variant_width(relative)
+        # A source narrower than several variants gives identical copies; list one
+        if width is not None and width not in candidates:
+            candidates[width] = f"{upload_url(relative)} {width}w"
+    return ', '.join(candidates.values())
+
+
+def init_app(app):
+    app.jinja_env.globals.update(image_url=image_url, image_srcset=image_srcset, upload_url=upload_url)
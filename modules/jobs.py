@@ -0,0 +1,190 @@
+from concurrent.futures import ThreadPoolExecutor
+from modules.cache import bump_inventory_generation
+from modules.database import get_db_connection
+from modules.hydration import PLACEHOLDER_IMAGE, parse_image_paths, dump_image_paths
+from modules.images import is_processed, process_upload
+from modules.uploads import delete_unused, release
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Uploads are processed off the request: the view saves the raw files and
+# records a job row, and a small per-process thread pool claims jobs from
+# the image_jobs table (migrate.py 0003). Because the queue is the table,
+# jobs survive restarts and any worker process can pick them up.
+IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', 2))
+
+# A 'running' job untouched this long belonged to a process that died
+JOB_STALE_SECONDS = int(os.environ.get('IMAGE_JOB_STALE_SECONDS', 600))
+
+# Finished jobs stay visible on the landlord dashboard this long
+JOB_VISIBLE_SECONDS = 600
+
+JOB_COLUMNS = "id, house_id, status, total, processed, accepted, error"
+
+_lock = threading.Lock()
+_executor = None
+_slots = None
+_pid = None
+
+
+def _get_executor():
+    """Per-process executor plus a semaphore bounding the jobs in flight"""
+    global _executor, _slots, _pid
+    with _lock:
+        # Threads don't survive fork(), so a child builds its own pool
+        if _executor is None or _pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=IMAGE_WORKERS, thread_name_prefix='image-job')
+            _slots = threading.BoundedSemaphore(IMAGE_WORKERS)
+            _pid = os.getpid()
+        return _executor, _slots
+
+
+def enqueue(cursor, house_id, user_id, paths):
+    """Record a job for freshly saved uploads in the caller's transaction.
+
+    Call ``kick()`` after the commit so a worker can see the row.
+    """
+    if not paths:
+        return None
+    cursor.execute("""
+        INSERT INTO image_jobs (house_id, created_by, paths, total)
+        VALUES (%s, %s, %s, %s)
+    """, (house_id, user_id, dump_image_paths(paths), len(paths)))
+    return cursor.lastrowid
+
+
+def kick():
+    """Start draining pending jobs on any idle worker thread in this process"""
+    executor, slots = _get_executor()
+    while slots.acquire(blocking=False):
+        executor.submit(_drain, slots)
+
+
+def drain():
+    """Process every pending job in this process and wait for them (for command-line tools)"""
+    global _executor
+    kick()
+    with _lock:
+        executor, _executor = _executor, None
+    executor.shutdown(wait=True)
+
+
+def _drain(slots):
+    try:
+        while True:
+            job = _claim_next()
+            if job is None:
+                return
+            _run(job)
+    except Exception as e:
+        logger.exception("Image worker stopped: %s", e)
+    finally:
+        slots.release()
+
+
+# Jobs a worker may claim: pending ones, and 'running' ones whose worker
+# died (any live worker touches its job at least every image)
+_CLAIMABLE = ("(status = 'pending' OR "
+              "(status = 'running' AND updated_at < NOW() - INTERVAL %s SECOND))")
+
+
+def _claim_next():
+    """Atomically move the oldest claimable job to 'running' and return it"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        while True:
+            cursor.execute(f"SELECT id, house_id, paths FROM image_jobs "
+                           f"WHERE {_CLAIMABLE} ORDER BY id LIMIT 1", (JOB_STALE_SECONDS,))
+            row = cursor.fetchone()
+            if row is None:
+                conn.commit()
+                return None
+            # Another thread or process may claim the same row first; a
+            # reclaimed job starts over, so its progress is reset
+            cursor.execute(f"UPDATE image_jobs SET status = 'running', processed = 0, "
+                           "updated_at = CURRENT_TIMESTAMP "
+                           f"WHERE id = %s AND {_CLAIMABLE}", (row[0], JOB_STALE_SECONDS))
+            conn.commit()
+            if cursor.rowcount == 1:
+                return row
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _run(job):
+    """Verify and resize a job's uploads, then attach the good ones to the house"""
+    job_id, house_id, paths = job
+    paths = parse_image_paths(paths)
+    accepted, rejected = [], []
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        for path in paths:
+            unused = []
+            try:
+                # Content already uploaded for another listing is done already
+                if not is_processed(path):
+                    process_upload(path)
+                accepted.append(path)
+            except Exception as e:
+                logger.warning("Rejected upload %s: %s", path, e)
+                rejected.append(path)
+                unused = release(conn, [path])
+            cursor.execute("UPDATE image_jobs SET processed = processed + 1 WHERE id = %s", (job_id,))
+            conn.commit()
+            delete_unused(conn, unused)
+
+        # Lock the row so concurrent jobs for one house don't lose each other's images
+        cursor.execute("SELECT image_paths FROM houses WHERE id = %s FOR UPDATE", (house_id,))
+        row = cursor.fetchone()
+        if row is None:
+            unused = release(conn, accepted)
+            cursor.execute("UPDATE image_jobs SET status = 'failed', error = %s WHERE id = %s",
+                           ('Property was deleted', job_id))
+            conn.commit()
+            delete_unused(conn, unused)
+            return
+
+        images = [p for p in parse_image_paths(row[0]) if p != PLACEHOLDER_IMAGE] + accepted
+        cursor.execute("UPDATE houses SET image_paths = %s, updated_at = CURRENT_TIMESTAMP WHERE id = %s",
+                       (dump_image_paths(images or [PLACEHOLDER_IMAGE]), house_id))
+        error = f"{len(rejected)} file(s) were not valid images" if rejected else None
+        cursor.execute("UPDATE image_jobs SET status = 'done', accepted = %s, error = %s WHERE id = %s",
+                       (len(accepted), error, job_id))
+        conn.commit()
+        if accepted:
+            bump_inventory_generation()
+    except Exception as e:
+        conn.rollback()
+        cursor.execute("UPDATE image_jobs SET status = 'failed', error = %s WHERE id = %s",
+                       (str(e)[:1000], job_id))
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def jobs_for_user(cursor, user_id):
+    """The user's unfinished and recently finished jobs, newest first"""
+    cursor.execute(f"""
+        SELECT {JOB_COLUMNS} FROM image_jobs
+        WHERE created_by = %s
+          AND (status IN ('pending', 'running') OR updated_at >= NOW() - INTERVAL %s SECOND)
+        ORDER BY id DESC LIMIT 20
+    """, (user_id, JOB_VISIBLE_SECONDS))
+    columns = JOB_COLUMNS.split(', ')
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def resume():
+    """Start on the backlog, orphaned jobs included, at boot"""
+    try:
+        kick()
+    except Exception as e:
+        logger.error("Could not resume image jobs: %s", e)
@@ -0,0 +1,125 @@
+from datetime import datetime, timezone
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+
+# Request threads only put records on a queue; a listener thread formats
+# them as JSON lines and writes them to stderr.
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+# When the writer falls this far behind, new records are dropped (and counted)
+LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+# Longer strings (chat messages, replies) are cut to this many characters
+LOG_MAX_FIELD_CHARS = int(os.environ.get('LOG_MAX_FIELD_CHARS', 500))
+# Share of routine chat records kept; warnings and errors are always kept
+CHAT_LOG_SAMPLE_RATE = float(os.environ.get('CHAT_LOG_SAMPLE_RATE', 0.1))
+
+# Attributes every LogRecord has; anything else came in through extra=
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener = None
+
+
+def _clip(value):
+    if isinstance(value, str) and len(value) > LOG_MAX_FIELD_CHARS:
+        return f"{value[:LOG_MAX_FIELD_CHARS]}…(+{len(value) - LOG_MAX_FIELD_CHARS} chars)"
+    return value
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and any extra= fields"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': _clip(record.getMessage()),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = _clip(value)
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread.
+
+    The stock prepare() renders the message on the calling thread; here
+    the record goes on the queue with its args untouched, so callers
+    should log with %-style args rather than f-strings and pass values
+    they won't mutate afterwards.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return copy.copy(record)
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Never block a request on logging
+            self.dropped += 1
+
+
+class Sampler(logging.Filter):
+    """Keeps ``rate`` of the records below WARNING, chosen at random"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or random.random() < self.rate
+
+
+def get_sampled_logger(name, rate=CHAT_LOG_SAMPLE_RATE):
+    """Logger for high-volume records, most of which are dropped before any work"""
+    logger = logging.getLogger(name)
+    if not any(isinstance(f, Sampler) for f in logger.filters):
+        logger.addFilter(Sampler(rate))
+    return logger
+
+
+def _start():
+    global _listener
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(JsonFormatter())
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+
+    root = logging.getLogger()
+    for handler in [h for h in root.handlers if isinstance(h, LazyQueueHandler)]:
+        root.removeHandler(handler)
+    root.addHandler(LazyQueueHandler(log_queue))
+
+
+def _stop():
+    # Flushes what is still queued
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def init_app(app):
+    """Route every logger (Flask's and werkzeug's included) through the queue"""
+    if _listener is not None:
+        return
+    logging.getLogger().setLevel(LOG_LEVEL)
+    _start()
+    atexit.register(_stop)
+    # The listener thread doesn't survive a fork (gunicorn --preload); start a fresh one
+    os.register_at_fork(after_in_child=_start)
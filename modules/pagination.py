@@ -0,0 +1,116 @@
+from flask import request, url_for
+from datetime import datetime
+import base64
+import os
+
+# Listing pages show this many rows unless ?per_page= asks for something else
+PAGE_SIZE = int(os.environ.get('PAGE_SIZE', 12))
+MAX_PAGE_SIZE = 100
+
+
+# Stands in for a NULL created_at (migrate.py 0007 backfills those with
+# the oldest timestamp, which is where NULLs sort anyway)
+MISSING_CREATED_AT = datetime(1970, 1, 1, 0, 0, 1)
+
+
+def encode_cursor(row):
+    """Turn a row's (created_at, id) sort key into an opaque URL token"""
+    created_at = row['created_at'] or MISSING_CREATED_AT
+    raw = f"{created_at.isoformat()}|{row['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Inverse of encode_cursor - returns None for missing or tampered tokens"""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        created_at, row_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def get_page_size():
+    try:
+        size = int(request.args.get('per_page', PAGE_SIZE))
+    except ValueError:
+        size = PAGE_SIZE
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+class Page:
+    """One page of keyset-paginated rows plus the cursors around it"""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    def _url(self, **cursor):
+        # Keep the current filters, swap in the new cursor
+        args = {k: v for k, v in request.args.items() if k not in ('after', 'before')}
+        args.update(cursor)
+        return url_for(request.endpoint, **(request.view_args or {}), **args)
+
+    @property
+    def next_url(self):
+        return self._url(after=self.next_cursor) if self.has_next else None
+
+    @property
+    def prev_url(self):
+        return self._url(before=self.prev_cursor) if self.has_prev else None
+
+
+def paginate(cursor, query, params, alias='h', hydrate=None):
+    """Run ``query`` (a SELECT ending in its WHERE clause) one page at a time.
+
+    Rows are ordered newest first on (created_at, id) and the page is
+    located with a range condition on that key instead of OFFSET, so
+    every page costs the same as the first one. ``?after=`` moves forward
+    from a cursor and ``?before=`` moves back. ``hydrate(cursor)``, if
+    given, replaces ``cursor.fetchall()`` to build the row objects.
+    """
+    size = get_page_size()
+    after = decode_cursor(request.args.get('after'))
+    before = None if after else decode_cursor(request.args.get('before'))
+    params = list(params)
+
+    if after:
+        query += f" AND ({alias}.created_at < %s OR ({alias}.created_at = %s AND {alias}.id < %s))"
+        params.extend([after[0], after[0], after[1]])
+        order = 'DESC'
+    elif before:
+        query += f" AND ({alias}.created_at > %s OR ({alias}.created_at = %s AND {alias}.id > %s))"
+        params.extend([before[0], before[0], before[1]])
+        order = 'ASC'
+    else:
+        order = 'DESC'
+
+    # Fetch one extra row to learn whether another page exists
+    query += f" ORDER BY {alias}.created_at {order}, {alias}.id {order} LIMIT %s"
+    params.append(size + 1)
+
+    cursor.execute(query, params)
+    rows = hydrate(cursor) if hydrate else cursor.fetchall()
+    more = len(rows) > size
+    rows = rows[:size]
+
+    if before:
+        rows.reverse()
+        has_prev, has_next = more, True
+    else:
+        has_prev, has_next = after is not None, more
+
+    next_cursor = encode_cursor(rows[-1]) if rows and has_next else None
+    prev_cursor = encode_cursor(rows[0]) if rows and has_prev else None
+    return Page(rows, next_cursor, prev_cursor)
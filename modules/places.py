@@ -0,0 +1,205 @@
+from collections import Counter, namedtuple
+from modules.reference_data import get_neighborhoods, get_regions
+from modules.search import STOPWORDS
+import logging
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+# A place named in free text: its region, and its neighborhood if one was named
+Place = namedtuple('Place', 'region_id neighborhood_id name')
+
+# Towns people name instead of their region -> words of that region's name
+REGION_ALIASES = {
+    'accra': 'greater accra',
+    'tema': 'greater accra',
+    'kumasi': 'ashanti',
+    'takoradi': 'western',
+    'sekondi': 'western',
+    'cape coast': 'central',
+    'koforidua': 'eastern',
+    'ho': 'volta',
+    'tamale': 'northern',
+    'sunyani': 'bono',
+    'bolgatanga': 'upper east',
+    'wa': 'upper west',
+}
+
+# Names shorter than this only match exactly, so everyday words don't turn
+# into places one typo away ('ho' / 'so', 'wa' / 'was')
+FUZZY_MIN_LENGTH = 4
+
+# Fuzzy lookups remembered per index; chat messages reuse a small vocabulary,
+# so after warm-up most words cost one dict lookup
+FUZZY_MEMO_SIZE = 20000
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def normalize(name):
+    return ' '.join(TOKEN_RE.findall((name or '').lower()))
+
+
+def max_typos(length):
+    return 1 if length < 8 else 2
+
+
+def trigrams(text):
+    padded = f' {text} '
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance (a swap counts as one edit), or
+    ``limit + 1`` as soon as it's certain to exceed ``limit``"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous, current = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+    return current[-1]
+
+
+class PlaceIndex:
+    """Exact and typo-tolerant lookup of region and neighborhood names.
+
+    Every name (plus region aliases and 'X region' forms) is a key. Exact
+    keys are one dict lookup; otherwise a trigram index narrows the keys
+    to the few that could be within ``max_typos`` edits before any edit
+    distance is computed.
+    """
+
+    def __init__(self, regions, neighborhoods):
+        self.places = {}    # key -> Place
+        for region in regions:
+            name = normalize(region['name'])
+            place = Place(region['id'], None, region['name'])
+            bare = name[:-len(' region')] if name.endswith(' region') else name
+            for key in (name, bare, bare + ' region'):
+                self.places.setdefault(key, place)
+
+        for alias, target in REGION_ALIASES.items():
+            place = self.places.get(target) or self._containing(regions, target)
+            if place is not None:
+                self.places.setdefault(alias, place)
+
+        # Neighborhoods are more specific, so they win a name shared with a region
+        for hood in neighborhoods:
+            self.places[normalize(hood['name'])] = Place(hood['region_id'], hood['id'], hood['name'])
+        self.places.pop('', None)
+
+        self.max_words = max((key.count(' ') + 1 for key in self.places), default=0)
+        self.max_length = max(map(len, self.places), default=0)
+        self.memo = {}  # phrase -> _fuzzy() result
+        self.trigrams = {}  # trigram -> keys containing it
+        for key in self.places:
+            if len(key) >= FUZZY_MIN_LENGTH:
+                for gram in set(trigrams(key)):
+                    self.trigrams.setdefault(gram, []).append(key)
+
+    @staticmethod
+    def _containing(regions, target):
+        for region in regions:
+            if f' {target} ' in f" {normalize(region['name'])} ":
+                return Place(region['id'], None, region['name'])
+        return None
+
+    def _fuzzy(self, text):
+        """(distance, key) of the closest key within ``max_typos``, or None"""
+        try:
+            return self.memo[text]
+        except KeyError:
+            pass
+        if len(self.memo) >= FUZZY_MEMO_SIZE:
+            self.memo.clear()
+        match = self.memo[text] = self._closest(text)
+        return match
+
+    def _closest(self, text):
+        if len(text) > self.max_length + max_typos(len(text)):
+            return None
+        limit = max_typos(len(text))
+        grams = trigrams(text)
+        # Each edit changes at most 3 trigrams, so a key within the limit
+        # shares at least this many with the text
+        needed = len(grams) - 3 * limit
+        shared = Counter()
+        for gram in set(grams):
+            shared.update(self.trigrams.get(gram, ()))
+        best = None
+        for key, count in shared.items():
+            if count >= needed:
+                distance = edit_distance(text, key, limit)
+                if distance <= limit and (best is None or (distance, -len(key)) < (best[0], -len(best[1]))):
+                    best = (distance, key)
+        return best
+
+    def resolve(self, text, ignore=frozenset()):
+        """The most specific place named in ``text``, or None.
+
+        Neighborhoods beat regions and exact names beat misspelled ones.
+        Words in ``ignore`` (and stopwords) are never fuzzy-matched, so a
+        caller's own vocabulary can't be mistaken for a typo'd place name.
+        """
+        words = TOKEN_RE.findall(text.lower())
+        # Spans containing one of these are only looked up exactly
+        exact_only = [word in STOPWORDS or word in ignore or word.isdigit() for word in words]
+        best = None  # (rank, place)
+        for size in range(min(self.max_words, len(words)), 0, -1):
+            for start in range(len(words) - size + 1):
+                phrase = ' '.join(words[start:start + size])
+                place = self.places.get(phrase)
+                distance = 0
+                if place is None:
+                    if len(phrase) < FUZZY_MIN_LENGTH or True in exact_only[start:start + size]:
+                        continue
+                    match = self._fuzzy(phrase)
+                    if match is None:
+                        continue
+                    distance, key = match
+                    place = self.places[key]
+                rank = (place.neighborhood_id is None, distance, -size)
+                if best is None or rank < best[0]:
+                    best = (rank, place)
+        return best[1] if best else None
+
+
+_lock = threading.Lock()
+_index = {'regions': None, 'neighborhoods': None, 'index': None}
+
+
+def _stale(regions, neighborhoods):
+    # reference_data hands out the same lists until it reloads
+    return _index['regions'] is not regions or _index['neighborhoods'] is not neighborhoods
+
+
+def get_place_index():
+    """The index over the current reference data, rebuilt whenever that reloads"""
+    regions, neighborhoods = get_regions(), get_neighborhoods()
+    if _stale(regions, neighborhoods):
+        with _lock:
+            if _stale(regions, neighborhoods):
+                _index.update(index=PlaceIndex(regions, neighborhoods),
+                              regions=regions, neighborhoods=neighborhoods)
+    return _index['index']
+
+
+def resolve_place(text, ignore=frozenset()):
+    """Region/neighborhood ids for the place named in ``text``, or None"""
+    return get_place_index().resolve(text, ignore)
+
+
+def warm():
+    """Build the index at worker boot, after the reference data is loaded"""
+    try:
+        get_place_index()
+    except Exception as e:
+        logger.error("Could not build the place index: %s", e)
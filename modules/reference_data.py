@@ -0,0 +1,66 @@
+from modules.database import get_db_connection
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Regions and neighborhoods almost never change; reload them at most this often
+REFERENCE_TTL = float(os.environ.get('REFERENCE_CACHE_TTL', 600))
+
+_lock = threading.Lock()
+_cache = {'regions': [], 'neighborhoods': [], 'loaded_at': None}
+
+
+def _load():
+    conn = get_db_connection(read_only=True)
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("SELECT * FROM regions ORDER BY id")
+        regions = cursor.fetchall()
+        cursor.execute("SELECT * FROM neighborhoods ORDER BY id")
+        neighborhoods = cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+    _cache.update(regions=regions, neighborhoods=neighborhoods, loaded_at=time.monotonic())
+
+
+def _fresh():
+    loaded_at = _cache['loaded_at']
+    return loaded_at is not None and time.monotonic() - loaded_at < REFERENCE_TTL
+
+
+def _get(key):
+    if not _fresh():
+        with _lock:
+            # Another thread may have reloaded while we waited
+            if not _fresh():
+                _load()
+    return _cache[key]
+
+
+def get_regions():
+    """All regions (shared list - treat as read-only)"""
+    return _get('regions')
+
+
+def get_neighborhoods():
+    """All neighborhoods (shared list - treat as read-only)"""
+    return _get('neighborhoods')
+
+
+def invalidate():
+    """Force the next lookup to reload, e.g. after editing regions/neighborhoods"""
+    _cache['loaded_at'] = None
+
+
+def warm():
+    """Load reference data at worker boot so the first requests don't pay for it"""
+    try:
+        with _lock:
+            _load()
+    except Exception as e:
+        logger.error("Could not preload reference data: %s", e)
@@ -0,0 +1,141 @@
+from modules.uploads import CHUNK_SIZE as HASH_CHUNK_SIZE, store_file
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+
+# Chunked uploads are assembled here, then hashed into the blob store on
+# finalize. Keep it on the same filesystem as static/uploads so the blob
+# is a hard link rather than a copy.
+UPLOAD_DIR = os.environ.get('CHUNKED_UPLOAD_DIR', os.path.join('instance', 'uploads'))
+MAX_UPLOAD_BYTES = int(os.environ.get('CHUNKED_UPLOAD_MAX_BYTES', 50 * 1024 * 1024))
+
+# Unfinished uploads older than this are deleted by gc_uploads.py
+UPLOAD_EXPIRY_SECONDS = 24 * 3600
+
+# Size clients are told to send; anything up to MAX_CHUNK_BYTES is accepted
+CHUNK_SIZE = 2 * 1024 * 1024
+MAX_CHUNK_BYTES = 8 * 1024 * 1024
+
+# Request bodies are copied to disk this much at a time, so memory per
+# request stays flat whatever the chunk or file size
+COPY_BUFFER = 64 * 1024
+
+UPLOAD_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+
+
+class UploadError(Exception):
+    """A chunked upload request that can't be honoured (carries an HTTP status)"""
+
+    def __init__(self, message, status=400, offset=None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset
+
+
+def _files(upload_id):
+    if not UPLOAD_ID_RE.match(upload_id or ''):
+        raise UploadError('Unknown upload', 404)
+    base = os.path.join(UPLOAD_DIR, upload_id)
+    return base + '.part', base + '.json'
+
+
+def _load(upload_id, user_id):
+    data_path, meta_path = _files(upload_id)
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+    except FileNotFoundError:
+        raise UploadError('Unknown upload', 404) from None
+    if meta['user_id'] != user_id:
+        raise UploadError('Unknown upload', 404)
+    return meta, data_path, meta_path
+
+
+def create(user_id, ext, size):
+    """Start an upload of ``size`` bytes; returns its id and the chunk size to use"""
+    if size <= 0:
+        raise UploadError('Empty upload')
+    if size > MAX_UPLOAD_BYTES:
+        raise UploadError(f'Images are limited to {MAX_UPLOAD_BYTES // (1024 * 1024)} MB', 413)
+    upload_id = uuid.uuid4().hex
+    data_path, meta_path = _files(upload_id)
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    open(data_path, 'wb').close()
+    with open(meta_path, 'w') as f:
+        json.dump({'user_id': user_id, 'ext': ext, 'size': size, 'created': time.time()}, f)
+    return {'upload_id': upload_id, 'offset': 0, 'size': size, 'chunk_size': CHUNK_SIZE}
+
+
+def status(upload_id, user_id):
+    """How much has arrived, so an interrupted client knows where to resume"""
+    meta, data_path, _ = _load(upload_id, user_id)
+    return {'upload_id': upload_id, 'offset': os.path.getsize(data_path), 'size': meta['size']}
+
+
+def write_chunk(upload_id, user_id, offset, stream, length):
+    """Write ``length`` bytes from ``stream`` at ``offset``.
+
+    Re-sending a chunk that already arrived is harmless; skipping ahead
+    is refused with the offset the client should resume from.
+    """
+    meta, data_path, _ = _load(upload_id, user_id)
+    received = os.path.getsize(data_path)
+    if offset is None or offset < 0 or offset > received:
+        raise UploadError('Chunk does not continue the upload', 409, offset=received)
+    if length is None:
+        raise UploadError('Content-Length required', 411, offset=received)
+    if length > MAX_CHUNK_BYTES:
+        raise UploadError(f'Chunks are limited to {MAX_CHUNK_BYTES} bytes', 413, offset=received)
+    if offset + length > meta['size']:
+        raise UploadError('Chunk runs past the declared size', 400, offset=received)
+
+    remaining = length
+    with open(data_path, 'r+b') as f:
+        f.seek(offset)
+        while remaining:
+            buf = stream.read(min(COPY_BUFFER, remaining))
+            if not buf:
+                break  # client went away; the bytes so far are kept
+            f.write(buf)
+            remaining -= len(buf)
+    if remaining:
+        raise UploadError('Chunk was cut short', 400, offset=os.path.getsize(data_path))
+    return {'upload_id': upload_id, 'offset': os.path.getsize(data_path), 'size': meta['size']}
+
+
+def finalize(conn, upload_id, user_id):
+    """Hash a complete upload into the blob store and return its path.
+
+    Takes a reference in the caller's transaction, like store_upload.
+    The chunk files are copied, not moved, and only deleted once that
+    transaction commits, so after a rollback the client can finalize
+    again.
+    """
+    meta, data_path, meta_path = _load(upload_id, user_id)
+    try:
+        size = os.path.getsize(data_path)
+        if size != meta['size']:
+            raise UploadError('Upload is incomplete', 409, offset=size)
+
+        digest = hashlib.sha256()
+        with open(data_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        path = store_file(conn, data_path, digest.hexdigest(), meta['ext'], size, move=False)
+    except FileNotFoundError:
+        # A concurrent finalize of the same upload committed first
+        raise UploadError('Upload was already finalized', 409) from None
+
+    conn.after_commit(lambda: _remove(data_path, meta_path))
+    return path
+
+
+def _remove(*paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass  # already finalized elsewhere
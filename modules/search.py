@@ -0,0 +1,282 @@
+from bisect import bisect_left
+from collections import Counter
+from datetime import timedelta
+from modules.cache import bump_generation, generation_age, read_generation
+from modules.database import READ_YOUR_WRITES_WINDOW, get_db_connection
+import logging
+import math
+import os
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+# BM25 tuning - the usual defaults
+K1 = 1.2
+B = 0.75
+
+# Title and place names say more about a listing than its description
+FIELD_WEIGHTS = {'title': 3, 'region_name': 2, 'neighborhood_name': 2, 'description': 1}
+
+# A query word also matches indexed words it is a prefix of, at a discount
+PREFIX_WEIGHT = 0.6
+MAX_PREFIX_EXPANSIONS = 50
+
+# Bumped by writes that change what a listing says (not by image jobs); a
+# worker whose index is behind catches up on the houses changed since
+SEARCH_GENERATION_FILE = os.environ.get('SEARCH_GENERATION_FILE',
+                                        os.path.join('instance', 'search.generation'))
+
+# Catch-up also re-reads rows changed this long before the last one started, for
+# transactions that committed after their updated_at was stamped
+CATCH_UP_OVERLAP_SECONDS = int(os.environ.get('SEARCH_CATCH_UP_OVERLAP_SECONDS', 60))
+
+# Deletions are remembered (house_deletions, migrate.py 0008) this long; an
+# index further behind than that is rebuilt from scratch
+DELETION_RETENTION_SECONDS = 86400
+
+STOPWORDS = {'a', 'an', 'and', 'the', 'in', 'at', 'of', 'for', 'to', 'with', 'is', 'on', 'near'}
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+HOUSE_FIELDS_QUERY = """
+    SELECT h.id, h.title, h.description, h.property_type, h.price,
+           r.name as region_name, n.name as neighborhood_name
+    FROM houses h
+    LEFT JOIN regions r ON h.region_id = r.id
+    LEFT JOIN neighborhoods n ON h.neighborhood_id = n.id
+"""
+
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall((text or '').lower()) if t not in STOPWORDS]
+
+
+class SearchIndex:
+    """In-memory inverted index over house listings with BM25 ranking.
+
+    Queries only touch the postings, never the houses table; the caller
+    loads the winning rows by primary key.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.postings = {}     # term -> {house_id: weighted term frequency}
+        self.docs = {}         # house_id -> (length, terms, property_type, price)
+        self.vocabulary = []   # sorted terms, for prefix lookups
+        self._vocabulary_dirty = False
+        self.total_length = 0
+        self.generation = None
+        self.watermark = None  # database time the last load or catch-up started
+
+    def add(self, house):
+        """Index (or re-index) one house row"""
+        terms = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(house.get(field)):
+                terms[token] += weight
+        length = sum(terms.values())
+        price = float(house['price']) if house.get('price') is not None else None
+
+        with self._lock:
+            self._remove(house['id'])
+            for term, tf in terms.items():
+                postings = self.postings.get(term)
+                if postings is None:
+                    postings = self.postings[term] = {}
+                    self._vocabulary_dirty = True
+                postings[house['id']] = tf
+            self.docs[house['id']] = (length, tuple(terms), house.get('property_type'), price)
+            self.total_length += length
+
+    def remove(self, house_id):
+        with self._lock:
+            self._remove(house_id)
+
+    def _remove(self, house_id):
+        doc = self.docs.pop(house_id, None)
+        if doc is None:
+            return
+        length, terms, _, _ = doc
+        self.total_length -= length
+        for term in terms:
+            postings = self.postings[term]
+            postings.pop(house_id, None)
+            if not postings:
+                del self.postings[term]
+                self._vocabulary_dirty = True
+
+    def _expand(self, token):
+        """Yield (term, weight) for the exact word and the words it prefixes"""
+        if self._vocabulary_dirty:
+            self.vocabulary = sorted(self.postings)
+            self._vocabulary_dirty = False
+        start = bisect_left(self.vocabulary, token)
+        for term in self.vocabulary[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(token):
+                break
+            yield term, 1.0 if term == token else PREFIX_WEIGHT
+
+    def search(self, query, property_type=None, min_price=None, max_price=None, limit=24):
+        """Return [(house_id, score)] best first, filtered by type and price"""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        with self._lock:
+            n_docs = len(self.docs)
+            if not n_docs:
+                return []
+            avg_length = self.total_length / n_docs
+            scores = Counter()
+
+            for token in set(tokens):
+                for term, weight in self._expand(token):
+                    postings = self.postings[term]
+                    idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for house_id, tf in postings.items():
+                        length = self.docs[house_id][0]
+                        norm = tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / avg_length))
+                        scores[house_id] += weight * idf * norm
+
+            results = []
+            for house_id, score in scores.most_common():
+                _, _, doc_type, price = self.docs[house_id]
+                if property_type and doc_type != property_type:
+                    continue
+                if min_price is not None and (price is None or price < min_price):
+                    continue
+                if max_price is not None and (price is None or price > max_price):
+                    continue
+                results.append((house_id, score))
+                if len(results) >= limit:
+                    break
+            return results
+
+
+search_index = SearchIndex()
+_refresh_lock = threading.Lock()
+
+
+def search_generation():
+    return read_generation(SEARCH_GENERATION_FILE)
+
+
+def bump_search_generation():
+    """Tell every worker's index to catch up (after a committed listing write)"""
+    bump_generation(SEARCH_GENERATION_FILE)
+
+
+def _connect(generation):
+    # Right after a bump the replica may not have the write behind it yet
+    return get_db_connection(read_only=generation_age(generation) > READ_YOUR_WRITES_WINDOW)
+
+
+def rebuild():
+    """(Re)load the whole index from the database"""
+    generation = search_generation()
+    conn = _connect(generation)
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("SELECT NOW() AS now")
+        watermark = cursor.fetchone()['now']
+        cursor.execute(HOUSE_FIELDS_QUERY)
+        fresh = SearchIndex()
+        for house in cursor:
+            fresh.add(house)
+    finally:
+        cursor.close()
+        conn.close()
+
+    global search_index
+    fresh.generation = generation
+    fresh.watermark = watermark
+    search_index = fresh
+
+
+def catch_up(index):
+    """Apply the listing writes since the index was last loaded, in place"""
+    generation = search_generation()
+    conn = _connect(generation)
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("SELECT NOW() AS now")
+        watermark = cursor.fetchone()['now']
+        if index.watermark is None or (watermark - index.watermark).total_seconds() > DELETION_RETENTION_SECONDS:
+            return False
+        since = index.watermark - timedelta(seconds=CATCH_UP_OVERLAP_SECONDS)
+        cursor.execute(HOUSE_FIELDS_QUERY + " WHERE h.updated_at >= %s OR h.created_at >= %s",
+                       (since, since))
+        changed = cursor.fetchall()
+        cursor.execute("SELECT house_id FROM house_deletions WHERE deleted_at >= %s", (since,))
+        deleted = [row['house_id'] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+        conn.close()
+
+    for house in changed:
+        index.add(house)
+    # Ids are never reused, so a deletion always wins over an older write
+    for house_id in deleted:
+        index.remove(house_id)
+    index.generation = generation
+    index.watermark = watermark
+    return True
+
+
+def record_deletion(cursor, house_id):
+    """Note a deleted house, in the deleting transaction, for other workers' indexes"""
+    cursor.execute("INSERT INTO house_deletions (house_id) VALUES (%s)", (house_id,))
+    cursor.execute("DELETE FROM house_deletions WHERE deleted_at < NOW() - INTERVAL %s SECOND",
+                   (DELETION_RETENTION_SECONDS,))
+
+
+def _refresh_in_background():
+    if not _refresh_lock.acquire(blocking=False):
+        return  # already refreshing
+
+    def run():
+        try:
+            if not catch_up(search_index):
+                rebuild()
+        except Exception as e:
+            logger.exception("Search index refresh failed: %s", e)
+        finally:
+            _refresh_lock.release()
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def get_index():
+    """The current index; listing writes trigger a background catch-up"""
+    if search_index.generation != search_generation():
+        _refresh_in_background()
+    return search_index
+
+
+def index_house(conn, house_id):
+    """Re-index one house right after this worker changed it.
+
+    Only this worker's index sees the change immediately; the generation
+    is left alone, so the catch-up still picks up everyone's writes.
+    """
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute(HOUSE_FIELDS_QUERY + " WHERE h.id = %s", (house_id,))
+    house = cursor.fetchone()
+    cursor.close()
+    if house:
+        search_index.add(house)
+    else:
+        search_index.remove(house_id)
+
+
+def unindex_house(house_id):
+    search_index.remove(house_id)
+
+
+def warm():
+    """Build the index at worker boot"""
+    try:
+        rebuild()
+    except Exception as e:
+        logger.error("Could not build search index: %s", e)
@@ -0,0 +1,227 @@
+from contextlib import contextmanager
+from flask import url_for
+from modules.cache import LRUCache
+import mimetypes
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+# Where listing images live: STORAGE_BACKEND=local keeps them under
+# static/uploads (served by Flask or the front-end web server);
+# STORAGE_BACKEND=s3 puts them in an S3-compatible bucket (AWS, MinIO...)
+# and templates link straight to it, so image bytes never pass through
+# the app workers.
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'local')
+UPLOAD_FOLDER = 'static/uploads'
+# Files being written before they are moved into UPLOAD_FOLDER. Not served,
+# so a half-written upload can't be fetched; keep it on the same filesystem
+# so the move is a rename.
+STAGING_FOLDER = os.environ.get('UPLOAD_STAGING_DIR', os.path.join('instance', 'uploads-staging'))
+
+S3_BUCKET = os.environ.get('S3_BUCKET')
+S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL')  # e.g. http://localhost:9000 for MinIO
+S3_REGION = os.environ.get('S3_REGION')
+S3_PREFIX = os.environ.get('S3_PREFIX', 'uploads/')
+# Set for a public bucket or CDN; otherwise templates get presigned URLs
+S3_PUBLIC_URL = os.environ.get('S3_PUBLIC_URL')
+S3_URL_EXPIRY = int(os.environ.get('S3_URL_EXPIRY', 3600))
+
+# Resized variants never change once written; originals are re-encoded in
+# place when their image job runs, so caches must revalidate those
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+ORIGINAL_CACHE_CONTROL = 'public, no-cache'
+
+
+class LocalStorage:
+    """Images as files under UPLOAD_FOLDER"""
+
+    def __init__(self, root=UPLOAD_FOLDER, staging_dir=STAGING_FOLDER):
+        self.root = root
+        self.staging_dir = staging_dir
+
+    def _full(self, path):
+        return os.path.join(self.root, path)
+
+    def put(self, path, local_path, move=True, immutable=False):
+        """Store the local file ``local_path`` as ``path``"""
+        target = self._full(path)
+        if os.path.abspath(local_path) == os.path.abspath(target):
+            return
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if move:
+            try:
+                os.replace(local_path, target)
+                return
+            except OSError:
+                pass  # different filesystem: copy below
+        else:
+            try:
+                os.link(local_path, target)
+                return
+            except OSError:
+                pass
+        # Copy into staging, then rename, so readers never see half a file
+        os.makedirs(self.staging_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='.incoming-', dir=self.staging_dir)
+        os.close(fd)
+        try:
+            shutil.copyfile(local_path, tmp_path)
+            os.replace(tmp_path, target)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        if move:
+            os.remove(local_path)
+
+    def exists(self, path):
+        return os.path.exists(self._full(path))
+
+    def delete(self, path):
+        try:
+            os.remove(self._full(path))
+        except OSError:
+            return
+        folder = os.path.dirname(self._full(path))
+        if os.path.abspath(folder) != os.path.abspath(self.root):
+            try:
+                os.rmdir(folder)
+            except OSError:
+                pass  # not empty
+
+    @contextmanager
+    def local_copy(self, path):
+        """A filesystem path for reading (and rewriting) ``path`` in place"""
+        yield self._full(path)
+
+    def walk(self, prefixes):
+        """(path, size, mtime) of everything stored under ``prefixes``"""
+        if not os.path.isdir(self.root):
+            return
+        for top in sorted(os.listdir(self.root)):
+            if not top.startswith(tuple(prefixes)):
+                continue
+            if os.path.isfile(self._full(top)):
+                stat = os.stat(self._full(top))
+                yield top, stat.st_size, stat.st_mtime
+                continue
+            for root, _, names in os.walk(self._full(top)):
+                for name in names:
+                    full_path = os.path.join(root, name)
+                    stat = os.stat(full_path)
+                    yield (os.path.relpath(full_path, self.root).replace(os.sep, '/'),
+                           stat.st_size, stat.st_mtime)
+
+    def url(self, path):
+        return url_for('static', filename='uploads/' + path)
+
+    def url_epoch(self):
+        """Changes whenever url() may hand out different URLs; these never expire"""
+        return None
+
+
+class S3Storage:
+    """Images as objects in an S3-compatible bucket"""
+
+    def __init__(self, bucket=S3_BUCKET, prefix=S3_PREFIX, endpoint_url=S3_ENDPOINT_URL,
+                 region=S3_REGION, public_url=S3_PUBLIC_URL, url_expiry=S3_URL_EXPIRY):
+        try:
+            import boto3
+        except ImportError:
+            raise RuntimeError("STORAGE_BACKEND=s3 needs boto3 (pip install boto3)") from None
+        if not bucket:
+            raise RuntimeError("STORAGE_BACKEND=s3 needs S3_BUCKET")
+        # Credentials come from the usual AWS_* variables / instance profile
+        self.client = boto3.client('s3', endpoint_url=endpoint_url, region_name=region)
+        self.bucket = bucket
+        self.prefix = prefix
+        self.public_url = public_url.rstrip('/') if public_url else None
+        self.url_expiry = url_expiry
+        self.staging_dir = tempfile.gettempdir()
+        # Re-signing on every render would give the browser a new URL (and a
+        # cache miss) each time, so reuse a URL for half its lifetime
+        self._signed = LRUCache('presigned_urls', 2 * 1024 * 1024, ttl=url_expiry / 2)
+
+    def _key(self, path):
+        return self.prefix + path
+
+    def put(self, path, local_path, move=True, immutable=False):
+        content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        self.client.upload_file(local_path, self.bucket, self._key(path), ExtraArgs={
+            'ContentType': content_type,
+            'CacheControl': IMMUTABLE_CACHE_CONTROL if immutable else ORIGINAL_CACHE_CONTROL,
+        })
+        if move:
+            os.remove(local_path)
+
+    def exists(self, path):
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(path))
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+
+    def delete(self, path):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(path))
+
+    @contextmanager
+    def local_copy(self, path):
+        """Download ``path`` to a temp dir; files written next to it are discarded after"""
+        workdir = tempfile.mkdtemp(prefix='image-')
+        local_path = os.path.join(workdir, os.path.basename(path))
+        try:
+            self.client.download_file(self.bucket, self._key(path), local_path)
+            yield local_path
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def walk(self, prefixes):
+        paginator = self.client.get_paginator('list_objects_v2')
+        for prefix in prefixes:
+            for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix)):
+                for obj in page.get('Contents', []):
+                    yield (obj['Key'][len(self.prefix):], obj['Size'],
+                           obj['LastModified'].timestamp())
+
+    def url(self, path):
+        if self.public_url:
+            return f"{self.public_url}/{self._key(path)}"
+        url = self._signed.get(path)
+        if url is None:
+            url = self.client.generate_presigned_url(
+                'get_object', Params={'Bucket': self.bucket, 'Key': self._key(path)},
+                ExpiresIn=self.url_expiry)
+            self._signed.set(path, url)
+        return url
+
+    def url_epoch(self):
+        """Changes whenever url() may hand out different URLs.
+
+        A signed URL is reused for half its lifetime, so one handed out
+        during an epoch stays valid until that epoch is over.
+        """
+        if self.public_url:
+            return None
+        return int(time.time() // (self.url_expiry / 2))
+
+
+BACKENDS = {'local': LocalStorage, 's3': S3Storage}
+
+_storage = None
+_lock = threading.Lock()
+
+
+def get_storage():
+    """The configured storage driver (created on first use)"""
+    global _storage
+    if _storage is None:
+        with _lock:
+            if _storage is None:
+                if STORAGE_BACKEND not in BACKENDS:
+                    raise RuntimeError(f"Unknown STORAGE_BACKEND {STORAGE_BACKEND!r}")
+                _storage = BACKENDS[STORAGE_BACKEND]()
+    return _storage
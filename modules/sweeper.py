@@ -0,0 +1,83 @@
+from modules.database import get_db_connection
+from modules.hydration import dump_image_paths, parse_image_paths
+from modules.uploads import delete_unused, release
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Image files are deleted off the request: views record the paths a house
+# stopped using in upload_releases (migrate.py 0005), one row per request,
+# and this sweeper drops the references and deletes unused files later.
+BATCH_SIZE = 20
+
+_lock = threading.Lock()
+_wake = threading.Event()
+_pid = None
+
+
+def queue_release(cursor, paths):
+    """Schedule ``paths`` for release when the caller's transaction commits"""
+    paths = [p for p in paths if p]
+    if paths:
+        cursor.execute("INSERT INTO upload_releases (paths) VALUES (%s)", (dump_image_paths(paths),))
+
+
+def sweep(batch_size=BATCH_SIZE):
+    """Apply queued releases until none are left; returns how many were applied"""
+    applied = 0
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        while True:
+            # SKIP LOCKED lets sweepers in several workers share the queue
+            cursor.execute("SELECT id, paths FROM upload_releases ORDER BY id LIMIT %s "
+                           "FOR UPDATE SKIP LOCKED", (batch_size,))
+            rows = cursor.fetchall()
+            if not rows:
+                conn.commit()
+                return applied
+            unused = []
+            for _, paths in rows:
+                unused += release(conn, parse_image_paths(paths))
+            cursor.executemany("DELETE FROM upload_releases WHERE id = %s", [(row[0],) for row in rows])
+            conn.commit()
+            delete_unused(conn, unused)
+            applied += len(rows)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def kick():
+    """Run the sweeper in a background thread unless one is already running"""
+    global _lock, _pid
+    if _pid != os.getpid():
+        # A lock held by the parent at fork() would never be released here
+        _lock, _pid = threading.Lock(), os.getpid()
+    _wake.set()
+    if not _lock.acquire(blocking=False):
+        return  # the running sweeper will see _wake
+    threading.Thread(target=_run, daemon=True, name='upload-sweeper').start()
+
+
+def _run():
+    try:
+        while _wake.is_set():
+            _wake.clear()
+            sweep()
+    except Exception as e:
+        logger.exception("Upload sweeper stopped: %s", e)
+    finally:
+        _lock.release()
+    if _wake.is_set():
+        kick()  # woken between the last sweep and releasing the lock
+
+
+def resume():
+    """Finish releases queued before a restart (at boot)"""
+    kick()
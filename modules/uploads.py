@@ -0,0 +1,176 @@
+from modules.hydration import PLACEHOLDER_IMAGE
+from modules.images import VARIANTS, forget_variants, is_variant, variant_path
+from modules.storage import UPLOAD_FOLDER, LocalStorage, get_storage
+import hashlib
+import os
+import tempfile
+
+# Uploads are stored once per content hash under blobs/<2 hex>/<sha256>.<ext>
+# (in the configured storage backend) and shared by every listing that uses them. The uploads table (migrate.py
+# 0004) counts the houses.image_paths entries pointing at each blob; the
+# blob is removed when the last reference is released.
+BLOB_DIR = 'blobs'
+CHUNK_SIZE = 1024 * 1024
+
+# Image types accepted from the upload forms and the bulk importer
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+
+
+def blob_path(digest, ext):
+    return f"{BLOB_DIR}/{digest[:2]}/{digest}.{ext}"
+
+
+def is_blob(path):
+    return path.startswith(BLOB_DIR + '/')
+
+
+def store_upload(conn, stream, ext):
+    """Save an uploaded stream, hashing it on the way in, and take a reference.
+
+    Returns the shared relative path. The reference row stays locked
+    until the caller commits, so a concurrent ``release`` of the same
+    content can't delete the file in between.
+    """
+    staging_dir = get_storage().staging_dir
+    os.makedirs(staging_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix='.incoming-', dir=staging_dir)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        return store_file(conn, tmp_path, digest.hexdigest(), ext, size)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def store_file(conn, tmp_path, digest, ext, size, move=True):
+    """Move (or with ``move=False`` copy) an already-hashed file into the blob store.
+
+    Nothing is stored if the content is known already.
+    """
+    cursor = conn.cursor()
+    try:
+        path, exists = _reference(cursor, digest, ext, size)
+    finally:
+        cursor.close()
+    if not exists:
+        get_storage().put(path, tmp_path, move=move)
+    return path
+
+
+def _reference(cursor, digest, ext, size):
+    """Add a reference to ``digest``; returns (path, whether the file is already stored)"""
+    cursor.execute("""
+        INSERT INTO uploads (hash, path, size, refcount) VALUES (%s, %s, %s, 1)
+        ON DUPLICATE KEY UPDATE refcount = refcount + 1
+    """, (digest, blob_path(digest, ext), size))
+    cursor.execute("SELECT path FROM uploads WHERE hash = %s", (digest,))
+    path = cursor.fetchone()[0]
+    return path, get_storage().exists(path)
+
+
+def _hash_file(full_path):
+    digest = hashlib.sha256()
+    with open(full_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def store_local_file(cursor, source_path):
+    """Reference a file from local disk, copying (or hard-linking) it in if the content is new.
+
+    The source is left in place. Returns (blob path, whether it was new).
+    """
+    ext = source_path.rsplit('.', 1)[-1].lower()
+    blob, exists = _reference(cursor, _hash_file(source_path), ext, os.path.getsize(source_path))
+    if not exists:
+        get_storage().put(blob, source_path, move=False)
+    return blob, not exists
+
+
+def adopt_file(cursor, path):
+    """Reference an existing per-house upload from the blob store (migrate.py 0004).
+
+    Those files are always local; they are linked (or uploaded) into the
+    configured storage along with their variants, and the caller removes
+    the old names after committing.
+    """
+    full_path = os.path.join(UPLOAD_FOLDER, path)
+    ext = path.rsplit('.', 1)[-1].lower()
+    blob, exists = _reference(cursor, _hash_file(full_path), ext, os.path.getsize(full_path))
+    if not exists:
+        storage = get_storage()
+        for source, target in [(path, blob)] + [(variant_path(path, v), variant_path(blob, v)) for v in VARIANTS]:
+            source = os.path.join(UPLOAD_FOLDER, source)
+            if os.path.exists(source):
+                storage.put(target, source, move=False, immutable=is_variant(target))
+    return blob
+
+
+def release(conn, paths):
+    """Drop one reference per path in the caller's transaction.
+
+    Returns the paths nobody uses any more; pass them to ``delete_unused``
+    once the transaction has committed, so a rollback never leaves rows
+    pointing at deleted files. Paths from before content addressing
+    belong to a single house and are always returned.
+    """
+    unused = []
+    cursor = conn.cursor()
+    try:
+        for path in paths:
+            if not path or path == PLACEHOLDER_IMAGE:
+                continue
+            cursor.execute("SELECT refcount FROM uploads WHERE path = %s FOR UPDATE", (path,))
+            row = cursor.fetchone()
+            if row is None:
+                if not is_blob(path):
+                    unused.append(path)
+            elif row[0] > 1:
+                cursor.execute("UPDATE uploads SET refcount = refcount - 1 WHERE path = %s", (path,))
+            else:
+                cursor.execute("DELETE FROM uploads WHERE path = %s", (path,))
+                unused.append(path)
+    finally:
+        cursor.close()
+    return unused
+
+
+def delete_unused(conn, paths):
+    """Delete the files of paths ``release`` returned, after its commit.
+
+    The same content may have been uploaded again in between, so each
+    path is checked for a reference first; the locking read stops a
+    concurrent ``store_upload`` from taking one until the file is gone.
+    """
+    cursor = conn.cursor()
+    try:
+        for path in paths:
+            cursor.execute("SELECT refcount FROM uploads WHERE path = %s FOR UPDATE", (path,))
+            if cursor.fetchone() is None:
+                if is_blob(path):
+                    remove_files(path)
+                else:
+                    remove_local_files(path)
+            conn.commit()
+    finally:
+        cursor.close()
+
+
+def remove_files(path, storage=None):
+    """Delete an upload and its variants"""
+    storage = storage or get_storage()
+    for name in [path] + [variant_path(path, v) for v in VARIANTS]:
+        storage.delete(name)
+    forget_variants(path)
+
+
+def remove_local_files(path):
+    """Delete a pre-content-addressing upload, which is always on local disk"""
+    remove_files(path, LocalStorage())
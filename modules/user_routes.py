@@ -1,17 +1,66 @@
 from flask import Blueprint, render_template, request, session, flash, redirect, url_for, jsonify
-import json
 import random
 import logging
-from modules.database import get_db_connection
+import os
+import threading
+import time
+from modules.cache import LRUCache, generation_age, inventory_generation
+from modules.chatbot import KEYWORDS, get_property_type_display_name, parse_message
+from modules.conditional import not_modified, page_etag, with_validators
+from modules.database import READ_YOUR_WRITES_WINDOW, get_db
+from modules.filters import browse_filters, house_filter_sql, normalize_price
+from modules.hydration import hydrate_houses, hydrate_house
+from modules.logs import get_sampled_logger
+from modules.pagination import paginate, get_page_size
+from modules.places import resolve_place
+from modules.reference_data import get_regions
+from modules.search import get_index
 
 user_bp = Blueprint('user', __name__)
 
 user_bp = Blueprint('user', __name__)
 
+# /houses result pages keyed by the normalized filter tuple
+houses_cache = LRUCache('houses',
+                        max_bytes=int(os.environ.get('HOUSES_CACHE_MAX_BYTES', 8 * 1024 * 1024)),
+                        ttl=float(os.environ.get('HOUSES_CACHE_TTL', 300)))
+
+# Total matches per filter tuple; paging through the results doesn't change it
+houses_totals = LRUCache('houses_totals', max_bytes=256 * 1024,
+                         ttl=float(os.environ.get('HOUSES_CACHE_TTL', 300)))
+
+# house id -> (updated_at, image_paths) of the row last rendered, so a
+# revalidation of an unchanged detail page needs no query at all
+house_versions = LRUCache('house_versions', max_bytes=1024 * 1024,
+                          ttl=float(os.environ.get('HOUSE_VERSIONS_TTL', 300)))
+
+# Chatbot search replies keyed by (property type, place, budget); greetings,
+# help and thanks never reach it (or the database)
+chatbot_cache = LRUCache('chatbot',
+                         max_bytes=int(os.environ.get('CHATBOT_CACHE_MAX_BYTES', 1024 * 1024)),
+                         ttl=float(os.environ.get('CHATBOT_CACHE_TTL', 300)))
+
+
+def inventory_db(generation):
+    """Connection for reading houses to cache under ``generation``.
+
+    Right after a bump the replica may not have the write behind it yet,
+    and whatever it returned would be cached as the new generation, so
+    those reads go to the primary.
+    """
+    return get_db(read_only=generation_age(generation) > READ_YOUR_WRITES_WINDOW)
+
 @user_bp.route('/')
 def index():
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    # The featured list only changes when a house is written
+    generation = inventory_generation()
+    etag = page_etag('index', generation)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    conn = inventory_db(generation)
+    cursor = conn.cursor()
 
     # Get featured houses (limit to 6 for homepage)
     cursor.execute("""
@@ -22,43 +71,21 @@ def index():
         ORDER BY h.created_at DESC
         LIMIT 6
     """)
-    featured_houses = cursor.fetchall()
-
-    # FIX: Properly parse image_paths for each house
-    for house in featured_houses:
-        if house['image_paths']:
-            try:
-                # If it's a string, parse it as JSON/list
-                if isinstance(house['image_paths'], str):
-                    house['image_paths'] = json.loads(house['image_paths'].replace("'", '"'))
-            except:
-                # If parsing fails, set to empty list
-                house['image_paths'] = []
-        else:
-            # If NULL or empty, set to empty list
-            house['image_paths'] = []
-
-    # Get all regions for filter
-    cursor.execute("SELECT * FROM regions")
-    regions = cursor.fetchall()
+    featured_houses = hydrate_houses(cursor)
 
     cursor.close()
-    conn.close()
 
-    return render_template('user/index.html',
-                           featured_houses=featured_houses,
-                           regions=regions)
+    # Regions for the filter come from the reference data cache
+    regions = get_regions()
 
-@user_bp.route('/houses')
-def houses():
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    return with_validators(render_template('user/index.html',
+                                           featured_houses=featured_houses,
+                                           regions=regions), etag)
 
-    # Get filter parameters
-    region_filter = request.args.get('region', '')
-    property_type_filter = request.args.get('property_type', '')
-    min_price = request.args.get('min_price', '')
-    max_price = request.args.get('max_price', '')
+def fetch_houses_page(region_filter, property_type_filter, min_price, max_price, generation):
+    """Run the filtered /houses query for the page named in the URL"""
+    conn = inventory_db(generation)
+    cursor = conn.cursor()
 
     # Build query with filters
     query = """
@@ -68,62 +95,121 @@ def houses():
         LEFT JOIN neighborhoods n ON h.neighborhood_id = n.id
         WHERE 1=1
     """
-    params = []
+    clauses, params = house_filter_sql(region_filter, property_type_filter, min_price, max_price)
+    query += clauses
 
-    if region_filter:
-        query += " AND h.region_id = %s"
-        params.append(region_filter)
+    # One page at a time, newest first
+    page = paginate(cursor, query, params, hydrate=hydrate_houses)
 
-    if property_type_filter:
-        query += " AND h.property_type = %s"
-        params.append(property_type_filter)
-
-    if min_price:
-        query += " AND h.price >= %s"
-        params.append(min_price)
-
-    if max_price:
-        query += " AND h.price <= %s"
-        params.append(max_price)
-
-    query += " ORDER BY h.created_at DESC"
-
-    cursor.execute(query, params)
-    houses = cursor.fetchall()
-
-    # FIX: Apply the same image parsing to houses page
-    for house in houses:
-        if house['image_paths']:
-            try:
-                # If it's a string, parse it as JSON/list
-                if isinstance(house['image_paths'], str):
-                    house['image_paths'] = json.loads(house['image_paths'].replace("'", '"'))
-            except:
-                # If parsing fails, set to empty list
-                house['image_paths'] = []
-        else:
-            # If NULL or empty, set to empty list
-            house['image_paths'] = []
+    cursor.close()
+    return page
+
+
+def count_houses(region_filter, property_type_filter, min_price, max_price, generation):
+    """Houses matching the /houses filters across all pages (cached per generation)"""
+    filters = (region_filter, property_type_filter, min_price, max_price)
+    total = houses_totals.get(filters, generation)
+    if total is None:
+        conn = inventory_db(generation)
+        cursor = conn.cursor()
+        clauses, params = house_filter_sql(*filters)
+        cursor.execute("SELECT COUNT(*) FROM houses h WHERE 1=1" + clauses, params)
+        total = cursor.fetchone()[0]
+        cursor.close()
+        houses_totals.set(filters, total, generation)
+    return total
 
-    # Get all regions for filter dropdown
-    cursor.execute("SELECT * FROM regions")
-    regions = cursor.fetchall()
 
-    cursor.close()
-    conn.close()
+@user_bp.route('/houses')
+def houses():
+    # Get filter parameters (normalized so equivalent URLs share a cache entry)
+    region_filter, property_type_filter, min_price, max_price = browse_filters(request.args)
+
+    # Popular filter combinations are served from the result cache until a
+    # house is added, edited or deleted (which bumps the inventory generation)
+    cache_key = (region_filter, property_type_filter, min_price, max_price,
+                 request.args.get('after', ''), request.args.get('before', ''), get_page_size())
+    generation = inventory_generation()
+
+    # A client holding this page from the same generation already has it
+    etag = page_etag('houses', generation, cache_key)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    page = houses_cache.get(cache_key, generation)
+    if page is None:
+        page = fetch_houses_page(region_filter, property_type_filter, min_price, max_price, generation)
+        houses_cache.set(cache_key, page, generation)
+    total = count_houses(region_filter, property_type_filter, min_price, max_price, generation)
+
+    # Regions for the filter dropdown come from the reference data cache
+    regions = get_regions()
+
+    return with_validators(render_template('user/houses.html',
+                                           houses=page.items,
+                                           page=page,
+                                           total=total,
+                                           regions=regions,
+                                           current_region=region_filter,
+                                           current_property_type=property_type_filter,
+                                           current_min_price=min_price,
+                                           current_max_price=max_price), etag)
+
+@user_bp.route('/search')
+def search():
+    """Full-text search over titles, descriptions and place names"""
+    query_text = request.args.get('q', '').strip()
+    property_type_filter = request.args.get('property_type', '').strip()
+    min_price = normalize_price(request.args.get('min_price', ''))
+    max_price = normalize_price(request.args.get('max_price', ''))
+
+    # Rank with the in-memory index, then load only the winning rows by id
+    results = get_index().search(query_text,
+                                 property_type=property_type_filter or None,
+                                 min_price=float(min_price) if min_price else None,
+                                 max_price=float(max_price) if max_price else None)
+    houses = []
+    if results:
+        ids = [house_id for house_id, _ in results]
+        cursor = get_db(read_only=True).cursor()
+        placeholders = ', '.join(['%s'] * len(ids))
+        cursor.execute(f"""
+            SELECT h.*, r.name as region_name, n.name as neighborhood_name
+            FROM houses h
+            LEFT JOIN regions r ON h.region_id = r.id
+            LEFT JOIN neighborhoods n ON h.neighborhood_id = n.id
+            WHERE h.id IN ({placeholders})
+        """, ids)
+        rows = {house.id: house for house in hydrate_houses(cursor)}
+        cursor.close()
+        houses = [rows[house_id] for house_id in ids if house_id in rows]
 
-    return render_template('user/houses.html',
+    return render_template('user/search.html',
                            houses=houses,
-                           regions=regions,
-                           current_region=region_filter,
+                           query=query_text,
                            current_property_type=property_type_filter,
                            current_min_price=min_price,
                            current_max_price=max_price)
 
+def house_etag(house_id, version):
+    updated_at, image_paths = version
+    # image_paths covers edits within the same second of updated_at
+    return page_etag('house', house_id, updated_at, image_paths), updated_at
+
+
 @user_bp.route('/house/<int:house_id>')
 def house_detail(house_id):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    # Any house write moves the generation, which retires remembered versions
+    generation = inventory_generation()
+    version = house_versions.get(house_id, generation)
+    if version is not None:
+        cached = not_modified(*house_etag(house_id, version))
+        if cached:
+            return cached
+
+    conn = inventory_db(generation)
+    cursor = conn.cursor()
 
     # Get house details
     cursor.execute("""
@@ -133,30 +219,21 @@ def house_detail(house_id):
         LEFT JOIN neighborhoods n ON h.neighborhood_id = n.id
         WHERE h.id = %s
     """, (house_id,))
-    house = cursor.fetchone()
+    house = hydrate_house(cursor)
+    cursor.close()
 
     if not house:
-        cursor.close()
-        conn.close()
         return "House not found", 404
 
-    # FIX: Apply the same image parsing to house detail page
-    if house['image_paths']:
-        try:
-            # If it's a string, parse it as JSON/list
-            if isinstance(house['image_paths'], str):
-                house['image_paths'] = json.loads(house['image_paths'].replace("'", '"'))
-        except:
-            # If parsing fails, set to empty list
-            house['image_paths'] = []
-    else:
-        # If NULL or empty, set to empty list
-        house['image_paths'] = []
-
-    cursor.close()
-    conn.close()
+    version = (house.updated_at, tuple(house.image_paths))
+    house_versions.set(house_id, version, generation)
+    etag, last_modified = house_etag(house_id, version)
+    cached = not_modified(etag, last_modified)
+    if cached:
+        return cached
 
-    return render_template('user/house_detail.html', house=house)
+    return with_validators(render_template('user/house_detail.html', house=house),
+                           etag, last_modified)
 
 @user_bp.route('/tenant-dashboard')
 def tenant_dashboard():
@@ -171,88 +248,184 @@ def tenant_dashboard():
 
 
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+# One record per chat, sampled (CHAT_LOG_SAMPLE_RATE) - every chat would flood the logs
+chat_logger = get_sampled_logger(__name__ + '.chat')
 
-# Property type mapping
-PROPERTY_TYPE_MAPPING = {
-    'single_room': ['single room', 'single', 'room', 'one room'],
-    'chamber_hall': ['chamber', 'chamber hall', 'chamber and hall', 'hall'],
-    '2_bedroom': ['2 bedroom', '2-bedroom', 'two bedroom', '2 bed'],
-    '3_bedroom': ['3 bedroom', '3-bedroom', 'three bedroom', '3 bed'],
-    'self_contained': ['self contained', 'self-contained', 'self contain', 'selfcontained'],
-    'store': ['store', 'shop', 'commercial', 'business', 'retail'],
-    'apartment': ['apartment', 'flat', 'unit']
-}
-
-# Region mapping
-REGION_MAPPING = {
-    'accra': ['accra', 'greater accra'],
-    'kumasi': ['kumasi', 'ashanti'],
-    'takoradi': ['takoradi', 'western'],
-    'cape coast': ['cape coast', 'central'],
-    'tema': ['tema'],
-    'eastern': ['eastern', 'koforidua'],
-    'volta': ['volta', 'ho'],
-    'northern': ['northern', 'tamale']
-}
-
-def detect_property_type(user_message):
-    """Detect property type from user message with fuzzy matching"""
-    user_message = user_message.lower()
-    
-    for db_type, keywords in PROPERTY_TYPE_MAPPING.items():
-        for keyword in keywords:
-            if keyword in user_message:
-                return db_type
-    return None
-
-def detect_region(user_message):
-    """Detect region from user message"""
-    user_message = user_message.lower()
-    
-    for region, keywords in REGION_MAPPING.items():
-        for keyword in keywords:
-            if keyword in user_message:
-                return region
-    return None
-
-def detect_budget(user_message):
-    """Extract budget range from user message"""
-    user_message = user_message.lower()
-    
-    # Look for specific price mentions
-    if 'under 1000' in user_message or 'below 1000' in user_message or 'less than 1000' in user_message:
-        return 1000
-    elif 'under 5000' in user_message or 'below 5000' in user_message:
-        return 5000
-    elif 'under 10000' in user_message or 'below 10000' in user_message:
-        return 10000
-    
-    # Look for price numbers
-    import re
-    price_matches = re.findall(r'(\d+)\s*(?:ghs?|cedis?)?', user_message)
-    if price_matches:
-        return int(price_matches[0])
-    
-    return None
 
-def get_property_type_display_name(property_type):
-    """Convert database property_type to readable format"""
-    return property_type.replace('_', ' ').title()
+def execute_safe_query(query, params, generation):
+    """Execute query with proper error handling; returns None if it failed.
 
-def execute_safe_query(cursor, query, params=None):
-    """Execute query with proper error handling"""
+    The request's connection is only checked out here, so chatbot replies
+    that never query (greetings, help, thanks) don't touch the pool. The
+    rows will be cached under ``generation``, which decides whether the
+    replica is safe to read (see inventory_db).
+    """
+    cursor = None
     try:
+        cursor = inventory_db(generation).cursor(dictionary=True)
         if params:
             cursor.execute(query, params)
         else:
             cursor.execute(query)
         return cursor.fetchall()
     except Exception as e:
-        logger.error(f"Query failed: {e}")
-        return []
+        logger.error("Query failed: %s", e)
+        return None
+    finally:
+        if cursor is not None:
+            cursor.close()
+
+
+CHATBOT_ERROR_REPLY = "😅 I'm having some technical difficulties right now. Please try our 'Browse Houses' page or check back in a few minutes!"
+CHATBOT_BUSY_REPLY = "⏳ Lots of people are searching right now! Please ask again in a moment, or try our 'Browse Houses' page."
+
+# Chats that may query the database at once in this worker process. When
+# every slot stays taken for CHATBOT_BUSY_WAIT seconds the chat gets the
+# busy reply straight away instead of queueing behind slow queries.
+CHATBOT_MAX_CONCURRENT = int(os.environ.get('CHATBOT_MAX_CONCURRENT', 8))
+CHATBOT_BUSY_WAIT = float(os.environ.get('CHATBOT_BUSY_WAIT', 0.05))
+chatbot_slots = threading.BoundedSemaphore(CHATBOT_MAX_CONCURRENT)
+
+
+def cached_reply(key, build):
+    """The chatbot reply for ``key``, from ``build(generation)`` on a cache miss.
+
+    Keyed on what was understood rather than the wording, so "2 bed in
+    kumasi" and "two bedroom, Kumasi" share an answer. A failed query
+    (None) isn't cached, and neither is the busy reply given when no
+    query slot frees up in time.
+    """
+    generation = inventory_generation()
+    reply = chatbot_cache.get(key, generation)
+    if reply is None:
+        if not chatbot_slots.acquire(timeout=CHATBOT_BUSY_WAIT):
+            logger.warning("Chatbot busy: %d chats already querying", CHATBOT_MAX_CONCURRENT)
+            return CHATBOT_BUSY_REPLY, []
+        try:
+            reply = build(generation)
+        finally:
+            chatbot_slots.release()
+        if reply is not None:
+            chatbot_cache.set(key, reply, generation)
+    return reply
+
+
+def search_reply(property_type, place, budget, generation):
+    """(response, properties) for a chatbot property search, or None if the query failed"""
+    # Build query based on detected parameters
+    query = """
+        SELECT h.*, r.name as region_name, n.name as neighborhood_name 
+        FROM houses h 
+        LEFT JOIN regions r ON h.region_id = r.id 
+        LEFT JOIN neighborhoods n ON h.neighborhood_id = n.id 
+        WHERE 1=1
+    """
+    params = []
+
+    # Place filter - by id, so the indexes on houses can be used
+    if place:
+        if place.neighborhood_id:
+            query += " AND h.neighborhood_id = %s"
+            params.append(place.neighborhood_id)
+        else:
+            query += " AND h.region_id = %s"
+            params.append(place.region_id)
+
+    # Property type filter
+    if property_type:
+        if property_type == 'apartment':
+            # Map 'apartment' to bedroom types
+            query += " AND h.property_type IN (%s, %s, %s)"
+            params.extend(['2_bedroom', '3_bedroom', 'self_contained'])
+        else:
+            query += " AND h.property_type = %s"
+            params.append(property_type)
+
+    # Budget filter
+    if budget:
+        query += " AND h.price <= %s"
+        params.append(budget)
+
+    # Order and limit
+    query += " ORDER BY h.created_at DESC LIMIT 5"
+
+    # Execute query
+    properties = execute_safe_query(query, params, generation)
+    if properties is None:
+        return None
+
+    # Generate appropriate response
+    if properties:
+        # Build context-aware response
+        response_parts = []
+
+        if place:
+            response_parts.append(f"🏙️ Found in {place.name}")
+        else:
+            response_parts.append("🏠 Found")
+
+        if property_type:
+            display_type = get_property_type_display_name(property_type)
+            response_parts.append(f"{display_type} properties")
+        else:
+            response_parts.append("properties")
+
+        if budget:
+            response_parts.append(f"under GHS {budget}")
+
+        response = " ".join(response_parts) + ": "
+
+        # Add property details
+        for i, prop in enumerate(properties[:3]):  # Show max 3
+            prop_type_display = get_property_type_display_name(prop['property_type'])
+            response += f"{prop['title']} ({prop_type_display}) - GHS {prop['price']}. "
+
+        if len(properties) > 3:
+            response += f" Plus {len(properties) - 3} more on our website!"
+
+    else:
+        # No properties found - helpful suggestions
+        suggestions = []
+        if property_type:
+            suggestions.append(f"try different {get_property_type_display_name(property_type)} options")
+        if place:
+            suggestions.append(f"try different areas besides {place.name}")
+        if budget:
+            suggestions.append(f"adjust your budget from GHS {budget}")
+
+        if suggestions:
+            response = f"🔍 No properties found. You could {', '.join(suggestions)}."
+        else:
+            response = "🔍 No properties found with those criteria. Try different search terms!"
+
+    return response, properties[:3]
+
+
+def latest_reply(generation):
+    """(response, properties) listing the newest houses, or None if the query failed"""
+    # Show all available properties
+    properties = execute_safe_query("""
+        SELECT h.*, r.name as region_name, n.name as neighborhood_name 
+        FROM houses h 
+        LEFT JOIN regions r ON h.region_id = r.id 
+        LEFT JOIN neighborhoods n ON h.neighborhood_id = n.id 
+        ORDER BY h.created_at DESC LIMIT 6
+    """, None, generation)
+    if properties is None:
+        return None
+
+    if properties:
+        response = "🏡 Here are available properties: "
+        for prop in properties[:4]:  # Show max 4
+            prop_type = get_property_type_display_name(prop['property_type'])
+            response += f"{prop['title']} in {prop['region_name']} ({prop_type}) - GHS {prop['price']}. "
+        response += "Visit our 'Browse Houses' page for more details!"
+    else:
+        response = "📝 No properties listed yet. Check back soon or landlords can add properties!"
+
+    return response, properties[:3]
+
 
 @user_bp.route('/chatbot', methods=['POST'])
 def chatbot():
@@ -263,17 +436,20 @@ def chatbot():
     if not user_message:
         return jsonify({'response': "Please type a message so I can help you! 😊", 'properties': []})
     
-    logger.info(f"Chatbot received: {user_message}")
-    
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    started = time.perf_counter()
+    intent = property_type = budget = place = None
 
     try:
-        # Convert to lowercase for matching
-        user_message_lower = user_message.lower()
-        
+        # One pass over the message finds the intent and every search detail
+        intent, property_type, budget = parse_message(user_message)
+        if intent in (None, 'search'):
+            # Region/neighborhood names (misspelled ones too) come from the reference data
+            place = resolve_place(user_message, ignore=KEYWORDS)
+            if intent is None and place is not None:
+                intent = 'search'  # "anything in Kasoa?"
+
         # === GREETINGS & BASIC INTERACTION ===
-        if any(word in user_message_lower for word in ['hello', 'hi', 'hey', 'hola']):
+        if intent == 'greeting':
             greetings = [
                 "👋 Hello! I'm your GhanaRentals assistant! I can help you find properties across Ghana.",
                 "🏡 Hi there! Ready to find your perfect rental? I'm here to help!",
@@ -282,125 +458,19 @@ def chatbot():
             response = random.choice(greetings)
 
         # === PROPERTY SEARCH QUERIES ===
-        elif any(word in user_message_lower for word in [
-            'house', 'property', 'rent', 'room', 'apartment', 'looking for', 
-            'need a', 'show me', 'find', 'want', 'store', 'shop', 'commercial',
-            'bedroom', 'self contained', 'chamber', 'single'
-        ]):
-            # Detect what the user is looking for
-            property_type = detect_property_type(user_message_lower)
-            region = detect_region(user_message_lower)
-            budget = detect_budget(user_message_lower)
-            
-            logger.info(f"Detected - Type: {property_type}, Region: {region}, Budget: {budget}")
-
-            # Build query based on detected parameters
-            query = """
-                SELECT h.*, r.name as region_name, n.name as neighborhood_name 
-                FROM houses h 
-                LEFT JOIN regions r ON h.region_id = r.id 
-                LEFT JOIN neighborhoods n ON h.neighborhood_id = n.id 
-                WHERE 1=1
-            """
-            params = []
-            
-            # Region filter
-            if region:
-                if region == 'accra':
-                    query += " AND r.name LIKE %s"
-                    params.append('%Accra%')
-                elif region == 'kumasi':
-                    query += " AND r.name LIKE %s"
-                    params.append('%Ashanti%')
-                # Add more regions as needed
-            
-            # Property type filter
-            if property_type:
-                if property_type == 'apartment':
-                    # Map 'apartment' to bedroom types
-                    query += " AND h.property_type IN (%s, %s, %s)"
-                    params.extend(['2_bedroom', '3_bedroom', 'self_contained'])
-                else:
-                    query += " AND h.property_type = %s"
-                    params.append(property_type)
-            
-            # Budget filter
-            if budget:
-                query += " AND h.price <= %s"
-                params.append(budget)
-            
-            # Order and limit
-            query += " ORDER BY h.created_at DESC LIMIT 5"
-            
-            # Execute query
-            properties = execute_safe_query(cursor, query, params)
-            
-            # Generate appropriate response
-            if properties:
-                # Build context-aware response
-                response_parts = []
-                
-                if region:
-                    response_parts.append(f"🏙️ Found in {region.title()}")
-                else:
-                    response_parts.append("🏠 Found")
-                
-                if property_type:
-                    display_type = get_property_type_display_name(property_type)
-                    response_parts.append(f"{display_type} properties")
-                else:
-                    response_parts.append("properties")
-                
-                if budget:
-                    response_parts.append(f"under GHS {budget}")
-                
-                response = " ".join(response_parts) + ": "
-                
-                # Add property details
-                for i, prop in enumerate(properties[:3]):  # Show max 3
-                    prop_type_display = get_property_type_display_name(prop['property_type'])
-                    response += f"{prop['title']} ({prop_type_display}) - GHS {prop['price']}. "
-                
-                if len(properties) > 3:
-                    response += f" Plus {len(properties) - 3} more on our website!"
-                    
-            else:
-                # No properties found - helpful suggestions
-                suggestions = []
-                if property_type:
-                    suggestions.append(f"try different {get_property_type_display_name(property_type)} options")
-                if region:
-                    suggestions.append(f"try different regions besides {region}")
-                if budget:
-                    suggestions.append(f"adjust your budget from GHS {budget}")
-                
-                if suggestions:
-                    response = f"🔍 No properties found. You could {', '.join(suggestions)}."
-                else:
-                    response = "🔍 No properties found with those criteria. Try different search terms!"
+        elif intent == 'search':
+            # Same (type, place, budget) -> same answer until a house is written
+            reply = cached_reply(('search', property_type, place, budget),
+                                 lambda generation: search_reply(property_type, place, budget, generation))
+            response, properties = reply or (CHATBOT_ERROR_REPLY, [])
 
         # === AFFIRMATIVE RESPONSES ===
-        elif any(word in user_message_lower for word in ['yes', 'yeah', 'sure', 'ok', 'show me', 'please']):
+        elif intent == 'affirmative':
             # Show all available properties
-            properties = execute_safe_query(cursor, """
-                SELECT h.*, r.name as region_name, n.name as neighborhood_name 
-                FROM houses h 
-                LEFT JOIN regions r ON h.region_id = r.id 
-                LEFT JOIN neighborhoods n ON h.neighborhood_id = n.id 
-                ORDER BY h.created_at DESC LIMIT 6
-            """)
-            
-            if properties:
-                response = "🏡 Here are available properties: "
-                for prop in properties[:4]:  # Show max 4
-                    prop_type = get_property_type_display_name(prop['property_type'])
-                    response += f"{prop['title']} in {prop['region_name']} ({prop_type}) - GHS {prop['price']}. "
-                response += "Visit our 'Browse Houses' page for more details!"
-            else:
-                response = "📝 No properties listed yet. Check back soon or landlords can add properties!"
+            response, properties = cached_reply(('latest',), latest_reply) or (CHATBOT_ERROR_REPLY, [])
 
         # === HELP & GUIDANCE ===
-        elif any(word in user_message_lower for word in ['help', 'what can you do', 'how does this work']):
+        elif intent == 'help':
             response = """ℹ️ I can help you:
 • Find properties by type: single rooms, chamber & hall, 2/3-bedroom, self-contained, stores
 • Search by location: Accra, Kumasi, Takoradi, etc.
@@ -409,11 +479,11 @@ def chatbot():
 Just tell me what you're looking for! 🏠"""
 
         # === CONTACT QUERIES ===
-        elif any(word in user_message_lower for word in ['contact', 'landlord', 'owner', 'phone', 'email']):
+        elif intent == 'contact':
             response = "📞 To contact landlords, please visit the property details page where you'll find direct contact information for quick responses!"
 
         # === THANK YOU ===
-        elif any(word in user_message_lower for word in ['thank', 'thanks', 'appreciate']):
+        elif intent == 'thanks':
             responses = [
                 "😊 You're very welcome! Happy to help you find your dream home!",
                 "🌟 My pleasure! Don't hesitate to ask if you need more help!",
@@ -430,19 +500,16 @@ Just tell me what you're looking for! 🏠"""
             ]
             response = random.choice(responses)
 
-    except Exception as e:
-        logger.error(f"Chatbot error: {str(e)}")
-        response = "😅 I'm having some technical difficulties right now. Please try our 'Browse Houses' page or check back in a few minutes!"
-    
-    finally:
-        # Always close database connections
-        try:
-            cursor.close()
-            conn.close()
-        except:
-            pass  # Ignore close errors
+    except Exception:
+        logger.exception("Chatbot error", extra={'chat_message': user_message})
+        response = CHATBOT_ERROR_REPLY
 
-    logger.info(f"Chatbot response: {response}")
+    chat_logger.info("chat", extra={
+        'chat_message': user_message, 'intent': intent, 'property_type': property_type,
+        'place': place.name if place else None, 'budget': budget,
+        'results': len(properties), 'reply': response,
+        'ms': round((time.perf_counter() - started) * 1000, 1),
+    })
     return jsonify({
         'response': response, 
         'properties': properties[:3]  # Return max 3 properties to frontend
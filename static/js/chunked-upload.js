@@ -0,0 +1,110 @@
+// Sends the images of forms marked data-chunked-upload in resumable chunks
+// before submitting them, so large photos never travel in one multipart
+// request and a dropped connection only repeats the current chunk.
+(function() {
+    const MAX_ATTEMPTS = 5;
+
+    function sleep(ms) {
+        return new Promise(function(resolve) { setTimeout(resolve, ms); });
+    }
+
+    async function json(response) {
+        const data = await response.json().catch(function() { return {}; });
+        if (!response.ok && data.offset === undefined) {
+            throw new Error(data.error || ('Upload failed (' + response.status + ')'));
+        }
+        return data;
+    }
+
+    async function uploadFile(endpoint, file, onProgress) {
+        const upload = await json(await fetch(endpoint, {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({filename: file.name, size: file.size})
+        }));
+        const url = endpoint + '/' + upload.upload_id;
+        let offset = 0;
+        let failures = 0;
+
+        while (offset < file.size) {
+            const chunk = file.slice(offset, offset + upload.chunk_size);
+            try {
+                const response = await fetch(url + '?offset=' + offset, {
+                    method: 'PUT',
+                    headers: {'Content-Type': 'application/octet-stream'},
+                    body: chunk
+                });
+                // On a mismatch the server says where to carry on from
+                const data = await json(response);
+                if (response.ok) {
+                    failures = 0;
+                } else if (++failures >= MAX_ATTEMPTS) {
+                    throw new Error(data.error);
+                }
+                offset = data.offset;
+            } catch (err) {
+                if (++failures >= MAX_ATTEMPTS) {
+                    throw err;
+                }
+                await sleep(1000 * failures);
+                try {
+                    offset = (await json(await fetch(url))).offset;
+                } catch (ignored) {
+                    // Still offline; retry the same chunk
+                }
+            }
+            onProgress(Math.min(offset, file.size));
+        }
+        return upload.upload_id;
+    }
+
+    document.querySelectorAll('form[data-chunked-upload]').forEach(function(form) {
+        const endpoint = form.dataset.chunkedUpload;
+        const input = form.querySelector('input[type="file"][name="images"]');
+        if (!input || !window.fetch || !window.DataTransfer) {
+            return;
+        }
+
+        // Registered after the page's own handlers, so validation runs first
+        form.addEventListener('submit', async function(e) {
+            const files = Array.from(input.files);
+            if (e.defaultPrevented || !files.length) {
+                return;
+            }
+            e.preventDefault();
+
+            const button = form.querySelector('button[type="submit"]');
+            const total = files.reduce(function(sum, file) { return sum + file.size; }, 0);
+            let done = 0;
+
+            try {
+                for (const file of files) {
+                    const uploadId = await uploadFile(endpoint, file, function(sent) {
+                        if (button) {
+                            const percent = Math.floor((done + sent) / total * 100);
+                            button.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Uploading photos... ' + percent + '%';
+                        }
+                    });
+                    done += file.size;
+                    const hidden = document.createElement('input');
+                    hidden.type = 'hidden';
+                    hidden.name = 'upload_ids';
+                    hidden.value = uploadId;
+                    form.appendChild(hidden);
+                }
+            } catch (err) {
+                alert('Could not upload your photos: ' + err.message);
+                if (button) {
+                    button.disabled = false;
+                    button.innerHTML = 'Try again';
+                }
+                form.querySelectorAll('input[name="upload_ids"]').forEach(function(el) { el.remove(); });
+                return;
+            }
+
+            // The files are on the server already; submit the rest of the form
+            input.files = new DataTransfer().files;
+            form.submit();
+        });
+    });
+})();
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Let the tests import the app's modules the way app.py does
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
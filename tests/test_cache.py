@@ -0,0 +1,67 @@
+from modules import cache
+from modules.cache import LRUCache
+
+
+def test_hit_and_miss():
+    lru = LRUCache('test_hit_and_miss', max_bytes=10000)
+    assert lru.get('a') is None
+    lru.set('a', [1, 2, 3])
+    assert lru.get('a') == [1, 2, 3]
+    assert (lru.hits, lru.misses) == (1, 1)
+
+
+def test_other_generation_is_a_miss():
+    lru = LRUCache('test_generation', max_bytes=10000)
+    lru.set('a', 'page', generation=1)
+    assert lru.get('a', 1) == 'page'
+    assert lru.get('a', 2) is None
+    # ...and the stale entry is gone, even for its own generation
+    assert lru.get('a', 1) is None
+    assert lru.stats()['entries'] == 0
+
+
+def test_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, 'monotonic', lambda: now[0])
+    lru = LRUCache('test_ttl', max_bytes=10000, ttl=60)
+    lru.set('a', 'page')
+    now[0] += 59
+    assert lru.get('a') == 'page'
+    now[0] += 2
+    assert lru.get('a') is None
+
+
+def test_evicts_least_recently_used():
+    entry = cache.approx_size('x' * 100)
+    lru = LRUCache('test_evicts', max_bytes=entry * 2)
+    lru.set('a', 'a' * 100)
+    lru.set('b', 'b' * 100)
+    lru.get('a')  # 'b' is now the oldest
+    lru.set('c', 'c' * 100)
+    assert lru.get('b') is None
+    assert lru.get('a') is not None and lru.get('c') is not None
+    assert lru.evictions == 1
+
+
+def test_delete():
+    lru = LRUCache('test_delete', max_bytes=10000)
+    lru.set('a', 'page')
+    lru.delete('a')
+    lru.delete('missing')
+    assert lru.get('a') is None
+    assert lru.stats()['bytes'] == 0
+
+
+def test_too_big_is_not_stored():
+    lru = LRUCache('test_too_big', max_bytes=10)
+    lru.set('a', 'x' * 100)
+    assert lru.get('a') is None
+
+
+def test_generation_file(tmp_path):
+    path = str(tmp_path / 'test.generation')
+    assert cache.read_generation(path) == 0
+    cache.bump_generation(path)
+    first = cache.read_generation(path)
+    cache.bump_generation(path)
+    assert cache.read_generation(path) > first > 0
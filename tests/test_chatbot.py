@@ -0,0 +1,43 @@
+import pytest
+
+from modules.chatbot import parse_message
+
+
+@pytest.mark.parametrize('message, intent', [
+    ("hello", 'greeting'),
+    ("Hi there", 'greeting'),
+    ("help", 'help'),
+    ("what can you do?", 'help'),
+    ("thanks!", 'thanks'),
+    ("how do I reach the landlord", 'contact'),
+    ("yes please", 'affirmative'),
+    ("looking for a house", 'search'),
+    ("asdf qwerty", None),
+])
+def test_intent(message, intent):
+    assert parse_message(message).intent == intent
+
+
+@pytest.mark.parametrize('message, property_type', [
+    ("single room in accra", 'single_room'),
+    ("2 bedroom apartment", '2_bedroom'),          # the more specific phrase wins
+    ("two bedroom flat", '2_bedroom'),
+    ("show me self-contained rooms", 'self_contained'),
+    ("chamber and hall", 'chamber_hall'),
+    ("shops for rent in Kasoa", 'store'),          # plurals count
+    ("any house", None),
+])
+def test_property_type(message, property_type):
+    assert parse_message(message).property_type == property_type
+
+
+@pytest.mark.parametrize('message, budget', [
+    ("single room under 1000", 1000),
+    ("budget is GHS 2,500", 2500),
+    ("800 cedis", 800),
+    ("2 bedroom under 1500", 1500),                # the cued number, not the bedrooms
+    ("3 bedroom", None),
+    ("a room, maximum 900", 900),
+])
+def test_budget(message, budget):
+    assert parse_message(message).budget == budget
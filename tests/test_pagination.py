@@ -0,0 +1,25 @@
+from datetime import datetime
+
+import pytest
+
+from modules.pagination import MISSING_CREATED_AT, decode_cursor, encode_cursor
+
+
+@pytest.mark.parametrize('created_at', [
+    datetime(2024, 5, 17, 9, 30),
+    datetime(2024, 5, 17, 9, 30, 12, 345678),
+])
+def test_round_trip(created_at):
+    token = encode_cursor({'created_at': created_at, 'id': 42})
+    assert '=' not in token
+    assert decode_cursor(token) == (created_at, 42)
+
+
+def test_missing_created_at():
+    token = encode_cursor({'created_at': None, 'id': 7})
+    assert decode_cursor(token) == (MISSING_CREATED_AT, 7)
+
+
+@pytest.mark.parametrize('token', [None, '', 'not a cursor', 'bm9waXBl', '%%%'])
+def test_bad_tokens(token):
+    assert decode_cursor(token) is None
@@ -0,0 +1,63 @@
+import pytest
+
+from modules.places import PlaceIndex, edit_distance
+
+REGIONS = [
+    {'id': 1, 'name': 'Greater Accra'},
+    {'id': 2, 'name': 'Ashanti'},
+    {'id': 3, 'name': 'Northern'},
+    {'id': 4, 'name': 'Upper West'},
+]
+NEIGHBORHOODS = [
+    {'id': 10, 'name': 'Adenta', 'region_id': 1},
+    {'id': 11, 'name': 'East Legon', 'region_id': 1},
+    {'id': 12, 'name': 'Asokwa', 'region_id': 2},
+    {'id': 13, 'name': 'Stone', 'region_id': 3},
+]
+
+
+@pytest.fixture(scope='module')
+def index():
+    return PlaceIndex(REGIONS, NEIGHBORHOODS)
+
+
+def ids(place):
+    return (place.region_id, place.neighborhood_id) if place else None
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("room in accra", (1, None)),               # town alias for its region
+    ("greater accra region", (1, None)),
+    ("kumasi shop", (2, None)),
+    ("self contained in adenta", (1, 10)),
+    ("2 bedroom in east legon, accra", (1, 11)),  # the neighborhood beats the region
+    ("room in wa", (4, None)),                  # short names match exactly
+    ("somewhere nice", None),
+])
+def test_exact(index, text, expected):
+    assert ids(index.resolve(text)) == expected
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("house in adentta", (1, 10)),
+    ("greater acra", (1, None)),
+    ("near asokaw", (2, 12)),                   # a swap is one edit
+    ("northen region", (3, None)),
+])
+def test_typos(index, text, expected):
+    assert ids(index.resolve(text)) == expected
+
+
+def test_short_words_are_not_fuzzy(index):
+    # 'was' is one edit from 'wa'
+    assert index.resolve("i was there") is None
+
+
+def test_ignored_words_are_not_fuzzy(index):
+    assert ids(index.resolve("store")) == (3, 13)
+    assert index.resolve("store", ignore={'store'}) is None
+
+
+def test_edit_distance_gives_up_past_the_limit():
+    assert edit_distance('adenta', 'adentta', 1) == 1
+    assert edit_distance('adenta', 'asokwa', 1) == 2